@@ -0,0 +1,179 @@
+"""
+金融数据缓存
+内存 + 磁盘两级TTL缓存，减少对Alpha Vantage的重复请求（免费额度很紧）
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import inspect
+import functools
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Optional
+
+import orjson
+
+logger = logging.getLogger("agent.cache")
+
+# 缓存目录：项目根目录下的 .cache/finance
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(_PROJECT_ROOT, ".cache", "finance")
+
+
+class TTLCache:
+    """内存TTL缓存，超过容量时按LRU淘汰"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: tuple, ttl: float) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        ts, value = entry
+        if time.time() - ts >= ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: tuple, value: Any, ts: Optional[float] = None):
+        self._data[key] = (time.time() if ts is None else ts, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class FileCache:
+    """磁盘JSON缓存，文件路径为 {cache_dir}/{endpoint}/{key}.json，内容为 {"ts": ..., "data": ...}"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, endpoint: str, key: str) -> str:
+        return os.path.join(self.cache_dir, endpoint, f"{key}.json")
+
+    def get(self, endpoint: str, key: str, ttl: float) -> Optional[tuple]:
+        """返回 (ts, data)，不存在或已过期时返回None"""
+        try:
+            with open(self._path(endpoint, key), "rb") as f:
+                entry = orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取缓存文件失败: {e}")
+            return None
+        ts = entry.get("ts", 0)
+        if time.time() - ts >= ttl:
+            return None
+        return ts, entry.get("data")
+
+    def set(self, endpoint: str, key: str, value: Any, ts: float):
+        path = self._path(endpoint, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps({"ts": ts, "data": value}))
+            # 原子替换，避免并发读到半写文件
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入缓存文件失败: {e}")
+
+
+class KeyedLocks:
+    """
+    按键分配的 asyncio.Lock，同一键的并发调用串行执行
+    记录每把锁的使用者数（持有 + 排队），最后一个使用者退出后才删除该键的锁，
+    避免排队者尚未拿到锁时新调用又建了一把新锁、与其并发执行
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, list] = {}  # key -> [lock, 使用者数]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+
+_memory_cache = TTLCache()
+_file_cache = FileCache()
+# 每个缓存键一把锁：相同参数的并发调用只有一个真正请求上游，其余等待后直接命中缓存
+_key_locks = KeyedLocks()
+
+
+def make_cache_key(params: Dict[str, Any]) -> str:
+    """根据请求参数生成稳定的缓存键"""
+    return hashlib.md5(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def cached(endpoint: str, ttl: float) -> Callable:
+    """
+    异步方法缓存装饰器
+    先查内存，再查磁盘，都未命中才真正调用；返回结果中含 "error" 时不缓存
+    相同参数的并发调用会合并为一次真正调用
+
+    用法：
+        @cached(endpoint="GLOBAL_QUOTE", ttl=30)
+        async def get_stock_quote(self, symbol: str) -> Dict[str, Any]: ...
+    """
+
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+
+        def lookup(key: str) -> Optional[Any]:
+            value = _memory_cache.get((endpoint, key), ttl)
+            if value is not None:
+                return value
+
+            entry = _file_cache.get(endpoint, key, ttl)
+            if entry is not None:
+                ts, value = entry
+                _memory_cache.set((endpoint, key), value, ts)
+                return value
+            return None
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k != "self"}
+            key = make_cache_key(params)
+
+            value = lookup(key)
+            if value is not None:
+                return value
+
+            async with _key_locks.hold((endpoint, key)):
+                # 等锁期间可能已有其他调用写入缓存
+                value = lookup(key)
+                if value is not None:
+                    return value
+
+                value = await func(self, *args, **kwargs)
+                if isinstance(value, dict) and "error" not in value:
+                    ts = time.time()
+                    _memory_cache.set((endpoint, key), value, ts)
+                    _file_cache.set(endpoint, key, value, ts)
+                return value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,42 @@
+"""
+env.yaml 读取
+按 (路径, 修改时间, 大小) 缓存解析结果，文件变更后自动失效；桥接服务、命令行客户端与金融智能体共用
+"""
+
+import os
+import functools
+import logging
+from typing import Any, Dict, Optional
+
+import yaml
+
+# 优先使用 libyaml 的 C 实现解析，未编译 libyaml 时回退到纯 Python 版本
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+logger = logging.getLogger("agent.env")
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_env_yaml(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=_YamlLoader) or {}
+    except (OSError, UnicodeDecodeError, yaml.YAMLError) as e:
+        logger.warning(f"解析env.yaml失败: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_env_yaml(path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取env.yaml（带缓存）
+    文件不存在时返回None，无法解析时返回空字典；返回的字典在调用方之间共享，不应修改
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _parse_env_yaml(path, st.st_mtime_ns, st.st_size)
@@ -0,0 +1,11 @@
+"""
+Alpha Vantage 请求限速
+免费档限制 5 次/分钟，进程内所有访问 Alpha Vantage 的模块（智能体、资源）共用同一个限速器
+"""
+
+import os
+
+from aiolimiter import AsyncLimiter
+
+# 付费档可通过环境变量调高
+ALPHA_VANTAGE_LIMITER = AsyncLimiter(int(os.getenv("ALPHA_VANTAGE_MAX_RPM", "5")), 60)
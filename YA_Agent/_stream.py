@@ -0,0 +1,34 @@
+"""
+OpenAI 兼容流式响应的增量合并
+桥接服务与命令行客户端共用
+"""
+
+from typing import Any, Dict
+
+
+def merge_stream_delta(msg: Dict[str, Any], delta: Dict[str, Any]) -> None:
+    """把流式 delta 合并进完整的 assistant message。
+
+    content 直接拼接；tool_calls 按 index 累积（id/name 只出现一次，arguments 分片到达）。
+    流中始终没有给出 id 时使用 call_{index} 占位，保证后续 role=tool 消息的 tool_call_id 与之对应。
+    """
+    if delta.get("role"):
+        msg["role"] = delta["role"]
+    if delta.get("content"):
+        msg["content"] = (msg.get("content") or "") + delta["content"]
+
+    for tc in delta.get("tool_calls") or []:
+        calls = msg.setdefault("tool_calls", [])
+        idx = tc.get("index", len(calls))
+        while len(calls) <= idx:
+            calls.append({"id": f"call_{len(calls)}", "type": "function", "function": {"name": "", "arguments": ""}})
+        slot = calls[idx]
+        if tc.get("id"):
+            slot["id"] = tc["id"]
+        if tc.get("type"):
+            slot["type"] = tc["type"]
+        fn = tc.get("function") or {}
+        if fn.get("name"):
+            slot["function"]["name"] += fn["name"]
+        if fn.get("arguments"):
+            slot["function"]["arguments"] += fn["arguments"]
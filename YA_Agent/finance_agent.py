@@ -4,14 +4,67 @@
 """
 
 import os
+import re
+import functools
 import aiohttp
-import yaml
+import orjson
 from typing import Dict, Any, Optional
 from .base_agent import BaseAgent
+from ._cache import cached
+from ._env import load_env_yaml
+from ._ratelimit import ALPHA_VANTAGE_LIMITER
 import logging
 
+# 中文股票名映射字典
+SYMBOL_MAPPING = {
+    "苹果": "AAPL", "特斯拉": "TSLA", "微软": "MSFT", "谷歌": "GOOGL",
+    "亚马逊": "AMZN", "英伟达": "NVDA", "脸书": "META", "阿里巴巴": "BABA",
+    "腾讯": "0700.HK", "百度": "BIDU", "京东": "JD", "拼多多": "PDD",
+    "美团": "3690.HK", "小米": "1810.HK", "茅台": "600519.SS",
+    "工商银行": "1398.HK", "建设银行": "0939.HK", "中国平安": "2318.HK"
+}
+
+
+def require_api_key(message: str = "API Key未配置"):
+    """API Key 校验装饰器：Key 无效时直接返回 error，不再进入方法体"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if not self._api_key_valid:
+                self.logger.error("无效的API Key，请设置有效的ALPHA_VANTAGE_API_KEY")
+                return {"error": message}
+            return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 class FinanceAgent(BaseAgent):
     """金融数据智能体"""
+
+    # 所有中文名合成一个正则，一次线性扫描代替逐个 in 判断（长名优先）
+    _NAME_PATTERN = re.compile(
+        "|".join(re.escape(k) for k in sorted(SYMBOL_MAPPING, key=len, reverse=True))
+    )
+    # 股票代码提取规则，按优先级排列
+    _SYMBOL_PATTERNS = [
+        re.compile(p, re.IGNORECASE) for p in (
+            r'([A-Z]{1,5}\.[A-Z]+)',  # 如 AAPL.O, 0700.HK
+            r'([A-Z]{2,5})',          # 如 AAPL, TSLA
+            r'(\d{4,5}\.[A-Z]+)',     # 如 0700.HK
+            r'股票\s*([A-Z0-9\.]+)',   # 如 "股票 AAPL"
+        )
+    ]
+    _CURRENCY_PATTERN = re.compile(r'(\w{3})\s*[对到]\s*(\w{3})')
+    # 查询类型路由：关键词（小写）-> 类型
+    _QUERY_KEYWORDS = {
+        "股票": "stock", "stock": "stock",
+        "汇率": "fx", "exchange": "fx",
+        "指标": "indicator", "indicator": "indicator",
+    }
+    _QUERY_ROUTER = re.compile("|".join(re.escape(k) for k in _QUERY_KEYWORDS))
     
     def __init__(self):
         super().__init__(
@@ -21,21 +74,21 @@ class FinanceAgent(BaseAgent):
         
         # 修改：使用更可靠的配置加载方法
         self.api_key = self._load_api_key_from_config()
+        # API Key 在进程内不变，初始化时判定一次，供 require_api_key 使用
+        self._api_key_valid = bool(self.api_key and self.api_key != "demo")
         if not self.api_key:
             # 改为警告而非立即报错，允许工具注册但使用时检查
             self.logger.warning("API Key未配置，金融工具将返回错误信息")
             
         self.base_url = "https://www.alphavantage.co/query"
         self.session = None
+        # 连接池在 init_session 中创建（TCPConnector 需要运行中的事件循环）
+        self._connector = None
+        # 预测器在首次预测时创建并复用，让并发的预测请求能在同一个批处理队列中合批
+        self._predictor = None
         
         # 中文股票名映射字典
-        self.symbol_mapping = {
-            "苹果": "AAPL", "特斯拉": "TSLA", "微软": "MSFT", "谷歌": "GOOGL",
-            "亚马逊": "AMZN", "英伟达": "NVDA", "脸书": "META", "阿里巴巴": "BABA",
-            "腾讯": "0700.HK", "百度": "BIDU", "京东": "JD", "拼多多": "PDD",
-            "美团": "3690.HK", "小米": "1810.HK", "茅台": "600519.SS",
-            "工商银行": "1398.HK", "建设银行": "0939.HK", "中国平安": "2318.HK"
-        }
+        self.symbol_mapping = SYMBOL_MAPPING
     
     def _load_api_key_from_config(self) -> str:
         """
@@ -59,15 +112,14 @@ class FinanceAgent(BaseAgent):
             
             self.logger.info(f"尝试从配置文件加载: {config_path}")
             
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                    yaml_key = config.get("ALPHA_VANTAGE_API_KEY")
-                    if yaml_key and yaml_key.strip() and yaml_key != "demo":
-                        self.logger.info("✓ 从env.yaml文件获取API Key")
-                        return yaml_key.strip()
-                    else:
-                        self.logger.warning("env.yaml中的API Key为空或为demo")
+            config = load_env_yaml(config_path)
+            if config is not None:
+                yaml_key = config.get("ALPHA_VANTAGE_API_KEY")
+                if yaml_key and yaml_key.strip() and yaml_key != "demo":
+                    self.logger.info("✓ 从env.yaml文件获取API Key")
+                    return yaml_key.strip()
+                else:
+                    self.logger.warning("env.yaml中的API Key为空或为demo")
             else:
                 self.logger.warning(f"配置文件不存在: {config_path}")
                 
@@ -98,37 +150,49 @@ class FinanceAgent(BaseAgent):
         return None
     
     async def init_session(self):
-        """初始化HTTP会话"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """
+        初始化HTTP会话
+        整个智能体生命周期内复用同一个会话与连接池，避免每次请求重新握手
+        """
+        if self.session and not self.session.closed:
+            return
+        self._connector = aiohttp.TCPConnector(
+            limit=32,
+            limit_per_host=16,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self._connector,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            timeout=aiohttp.ClientTimeout(total=15),
+            json_serialize=lambda obj: orjson.dumps(obj).decode(),
+        )
     
+    @require_api_key("API Key未配置，请在env.yaml中设置ALPHA_VANTAGE_API_KEY")
     async def process(self, query: str, context: Optional[Dict] = None) -> Dict[str, Any]:
         """处理金融查询"""
         self.logger.info(f"处理金融查询: {query}")
         
-        # 先验证API Key
-        if not self._validate_api_key():
-            return {"error": "API Key未配置，请在env.yaml中设置ALPHA_VANTAGE_API_KEY"}
-        
-        # 解析查询类型
-        if "股票" in query or "stock" in query.lower():
+        # 解析查询类型：一次扫描找出命中的全部类型，再按 股票 > 汇率 > 指标 的优先级分发
+        kinds = {self._QUERY_KEYWORDS[m.group(0)] for m in self._QUERY_ROUTER.finditer(query.casefold())}
+        if "stock" in kinds:
             symbol = await self._extract_symbol(query)
             return await self.get_stock_quote(symbol)
-        elif "汇率" in query or "exchange" in query.lower():
+        elif "fx" in kinds:
             currencies = await self._extract_currencies(query)
             return await self.get_exchange_rate(*currencies)
-        elif "指标" in query or "indicator" in query.lower():
+        elif "indicator" in kinds:
             return await self.get_market_indicator()
         else:
             return {"error": "无法识别的金融查询类型"}
     
+    @require_api_key()
+    @cached(endpoint="GLOBAL_QUOTE", ttl=30)
     async def get_stock_quote(self, symbol: str = "AAPL") -> Dict[str, Any]:
         """获取股票报价"""
         self.logger.info(f"=== 开始股票查询: {symbol} ===")
         
-        if not self._validate_api_key():
-            return {"error": "API Key未配置"}
-            
         params = {
             "function": "GLOBAL_QUOTE",
             "symbol": symbol,
@@ -138,21 +202,20 @@ class FinanceAgent(BaseAgent):
         self.logger.info(f"API请求参数: {params}")
         
         try:
+            await ALPHA_VANTAGE_LIMITER.acquire()
             async with self.session.get(self.base_url, params=params) as response:
-                raw_response = await response.text()
-                self.logger.info(f"API原始响应: {raw_response}")
-                
-                data = await response.json()
+                data = await response.json(loads=orjson.loads)
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"API原始响应: {orjson.dumps(data).decode()}")
                 return self._format_stock_data(data)
         except Exception as e:
             self.logger.error(f"股票API请求失败: {e}")
             return {"error": f"API请求失败: {str(e)}"}
     
+    @require_api_key()
+    @cached(endpoint="CURRENCY_EXCHANGE_RATE", ttl=60)
     async def get_exchange_rate(self, from_currency: str = "USD", to_currency: str = "CNY") -> Dict[str, Any]:
         """获取汇率"""
-        if not self._validate_api_key():
-            return {"error": "API Key未配置"}
-            
         params = {
             "function": "CURRENCY_EXCHANGE_RATE",
             "from_currency": from_currency,
@@ -161,39 +224,32 @@ class FinanceAgent(BaseAgent):
         }
         
         try:
+            await ALPHA_VANTAGE_LIMITER.acquire()
             async with self.session.get(self.base_url, params=params) as response:
-                data = await response.json()
+                data = await response.json(loads=orjson.loads)
                 return self._format_exchange_data(data)
         except Exception as e:
             self.logger.error(f"汇率API请求失败: {e}")
             return {"error": f"API请求失败: {str(e)}"}
     
+    @require_api_key()
     async def get_market_indicator(self) -> Dict[str, Any]:
         """获取市场指标"""
-        if not self._validate_api_key():
-            return {"error": "API Key未配置"}
-            
         params = {
             "function": "MARKET_STATUS",
             "apikey": self.api_key
         }
         
         try:
+            await ALPHA_VANTAGE_LIMITER.acquire()
             async with self.session.get(self.base_url, params=params) as response:
-                data = await response.json()
+                data = await response.json(loads=orjson.loads)
                 return data
         except Exception as e:
             self.logger.error(f"市场指标API请求失败: {e}")
             return {"error": f"API请求失败: {str(e)}"}
     
     # 辅助方法
-    def _validate_api_key(self) -> bool:
-        """验证API Key是否有效"""
-        if not self.api_key or self.api_key == "demo":
-            self.logger.error("无效的API Key，请设置有效的ALPHA_VANTAGE_API_KEY")
-            return False
-        return True
-    
     def _format_stock_data(self, data: Dict) -> Dict[str, Any]:
         """格式化股票数据 - 增强错误处理"""
         if "Global Quote" in data:
@@ -243,26 +299,19 @@ class FinanceAgent(BaseAgent):
     
     async def _extract_symbol(self, query: str) -> str:
         """从查询中提取股票代码 - 增强版本"""
-        import re
-        
         # 1. 先检查中文名称映射
-        for chinese_name, symbol in self.symbol_mapping.items():
-            if chinese_name in query:
-                self.logger.info(f"映射中文股票名 '{chinese_name}' -> '{symbol}'")
-                return symbol
+        match = self._NAME_PATTERN.search(query)
+        if match:
+            chinese_name = match.group(0)
+            symbol = self.symbol_mapping[chinese_name]
+            self.logger.info(f"映射中文股票名 '{chinese_name}' -> '{symbol}'")
+            return symbol
         
         # 2. 尝试提取股票代码
-        patterns = [
-            r'([A-Z]{1,5}\.[A-Z]+)',  # 如 AAPL.O, 0700.HK
-            r'([A-Z]{2,5})',          # 如 AAPL, TSLA
-            r'(\d{4,5}\.[A-Z]+)',     # 如 0700.HK
-            r'股票\s*([A-Z0-9\.]+)',   # 如 "股票 AAPL"
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, query, re.IGNORECASE)
-            if matches:
-                symbol = matches[0].upper()
+        for pattern in self._SYMBOL_PATTERNS:
+            match = pattern.search(query)
+            if match:
+                symbol = match.group(1).upper()
                 self.logger.info(f"正则提取股票代码: '{symbol}'")
                 return symbol
         
@@ -272,26 +321,24 @@ class FinanceAgent(BaseAgent):
     
     async def _extract_currencies(self, query: str) -> tuple:
         """从查询中提取货币对"""
-        import re
-        pattern = r'(\w{3})\s*[对到]\s*(\w{3})'
-        match = re.search(pattern, query)
+        match = self._CURRENCY_PATTERN.search(query)
         if match:
             return match.group(1), match.group(2)
         return "USD", "CNY"  # 默认
     
+    @require_api_key()
+    @cached(endpoint="TIME_SERIES_DAILY", ttl=6 * 3600)
     async def get_stock_prediction(self, symbol: str, days: int = 5) -> Dict[str, Any]:
         """
         获取股票价格预测
         使用 Amazon Chronos-Bolt 模型
         """
         import datetime
+        import numpy as np
         from core.predictor import FinancialPredictor
 
         self.logger.info(f"=== 开始股票预测: {symbol}, 预测天数: {days} ===")
         
-        if not self._validate_api_key():
-            return {"error": "API Key未配置"}
-            
         # 1. 获取历史数据 (TIME_SERIES_DAILY)
         try:
             params = {
@@ -301,11 +348,13 @@ class FinanceAgent(BaseAgent):
                 "outputsize": "compact"
             }
             
+            await ALPHA_VANTAGE_LIMITER.acquire()
             async with self.session.get(self.base_url, params=params) as response:
-                data = await response.json()
+                data = await response.json(loads=orjson.loads)
                 
-                # 记录完整的 API 响应以便调试
-                self.logger.info(f"历史数据API响应: {data}")
+                # 记录完整的 API 响应以便调试（响应体较大，仅 DEBUG 级别格式化）
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"历史数据API响应: {data}")
 
                 if "Error Message" in data:
                     return {"error": f"API返回错误: {data['Error Message']}"}
@@ -322,24 +371,32 @@ class FinanceAgent(BaseAgent):
                     return {"error": f"未能获取历史数据，API响应内容: {data}"}
                 
                 # Alpha Vantage 数据是倒序的 (最新日期在前)
-                # 我们需要正序的历史数据
-                sorted_dates = sorted(time_series.keys())
-                historical_prices = [float(time_series[d]["4. close"]) for d in sorted_dates]
+                # 我们需要正序的历史数据：日期为 YYYY-MM-DD，字典序即时间序
+                dates = np.array(list(time_series.keys()))
+                closes = np.fromiter(
+                    (float(v["4. close"]) for v in time_series.values()),
+                    dtype=np.float64,
+                    count=len(time_series),
+                )
+                order = np.argsort(dates)
+                sorted_dates = dates[order]
+                historical_prices = closes[order]
                 
                 if len(historical_prices) < 30:
                     return {"error": f"历史数据不足30天 ({len(historical_prices)}天)，难以准确预测"}
 
                 # 3. 调用预测模型
                 try:
-                    predictor = FinancialPredictor() 
-                    forecast = predictor.predict(
+                    if self._predictor is None:
+                        self._predictor = FinancialPredictor()
+                    forecast = await self._predictor.predict_async(
                         context=historical_prices,
                         prediction_length=days,
                         num_samples=20
                     )
                     
-                    last_date = sorted_dates[-1]
-                    last_price = historical_prices[-1]
+                    last_date = str(sorted_dates[-1])
+                    last_price = float(historical_prices[-1])
                     start_date = datetime.datetime.strptime(last_date, "%Y-%m-%d")
                     future_dates = [(start_date + datetime.timedelta(days=i+1)).strftime("%Y-%m-%d") for i in range(days)]
                     
@@ -378,4 +435,6 @@ class FinanceAgent(BaseAgent):
     async def close(self):
         """清理资源"""
         if self.session:
-            await self.session.close()
\ No newline at end of file
+            await self.session.close()
+            self.session = None
+            self._connector = None
\ No newline at end of file
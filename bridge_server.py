@@ -19,19 +19,26 @@
 说明：
 - 该 Bridge 会在服务端持有 DeepSeek API Key，浏览器不会接触密钥。
 - SSE 事件 data 为 JSON，每条包含 type 字段，前端按 type 渲染。
+- MCP 连接与 tools 列表按 server_url 长期缓存（MCP_TOOLS_TTL_S，默认 60 秒后重新拉取），不再每次请求重连。
+- DeepSeek 以 stream=true 调用，生成中的文本以 type=delta 事件逐段推送，结束时再推送 final。
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
+import base64
+import contextlib
+import dataclasses
+import gzip
 import os
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, AsyncGenerator, Dict, List, Optional
 
 import httpx
+import orjson
 import uvicorn
-import yaml
 from starlette.applications import Starlette
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
@@ -41,25 +48,23 @@ from starlette.routing import Route
 from modules.YA_Common.mcp.mcp_client import MCPClient
 from modules.YA_Common.mcp.openai_adapter import OpenAIMCPAdapter
 from modules.YA_Common.types.mcp import MCPServerMetadata
+from YA_Agent._env import load_env_yaml
+from YA_Agent._stream import merge_stream_delta
 
 
 DEFAULT_MCP_SERVER_URL = "http://127.0.0.1:19420/"
 DEFAULT_DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
 DEFAULT_DEEPSEEK_MODEL = "deepseek-chat"
 DEFAULT_TIMEOUT_S = 60.0
+DEFAULT_MAX_PARALLEL_TOOLS = 4
+DEFAULT_MCP_TOOLS_TTL_S = 60.0
+# verbose 事件（完整 messages / tools）超过该大小时压缩后再推送
+SSE_COMPRESS_MIN_BYTES = 1024
 
 WEB_DIR = Path(__file__).resolve().parent / "web"
 
-
-def _load_env_yaml(path: str = "env.yaml") -> Dict[str, Any]:
-    p = Path(path)
-    if not p.exists():
-        return {}
-    try:
-        data = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
+# 进程级工具并发上限：多个 /api/chat 连接同时执行工具时共享，避免外部 API 被突发请求打满
+_TOOL_SEM = asyncio.Semaphore(int(os.getenv("MAX_TOOL_CONCURRENCY", "8")))
 
 
 def _get_config_value(key: str, env_yaml: Dict[str, Any], default: Optional[str] = None) -> Optional[str]:
@@ -71,55 +76,134 @@ def _get_config_value(key: str, env_yaml: Dict[str, Any], default: Optional[str]
     return default
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DeepSeekConfig:
+    """启动时解析一次的 DeepSeek 配置，之后只读共享。"""
+
     api_key: str
     base_url: str
     model: str
 
 
+_LLM_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _get_llm_client() -> httpx.AsyncClient:
+    """进程级共享的 DeepSeek HTTP/2 客户端：跨 /api/chat 请求复用连接，省去每次 TLS 握手。"""
+    global _LLM_CLIENT
+    if _LLM_CLIENT is None or _LLM_CLIENT.is_closed:
+        _LLM_CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=DEFAULT_TIMEOUT_S,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return _LLM_CLIENT
+
+
 class DeepSeekOpenAICompat:
-    def __init__(self, cfg: DeepSeekConfig, timeout_s: float = DEFAULT_TIMEOUT_S):
+    def __init__(
+        self,
+        cfg: DeepSeekConfig,
+        timeout_s: float = DEFAULT_TIMEOUT_S,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.cfg = cfg
-        self.client = httpx.AsyncClient(timeout=timeout_s)
+        # URL 与请求头在实例生命周期内不变，只构造一次（共享 client 可能服务不同 Key，所以不挂在 client 上）
+        self._url = f"{cfg.base_url.rstrip('/')}/chat/completions"
+        self._headers = {
+            "Authorization": f"Bearer {cfg.api_key}",
+            "Content-Type": "application/json",
+        }
+        # 传入共享 client 时不负责关闭它
+        self._owns_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(timeout=timeout_s)
 
     async def aclose(self) -> None:
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
+
+    def _build_request(
+        self,
+        messages: List[Dict[str, Any]] | bytes,
+        tools: Optional[List[Dict[str, Any]] | bytes],
+        tool_choice: Optional[str],
+        temperature: float,
+        stream: bool = False,
+    ) -> tuple[str, Dict[str, str], bytes]:
+        """拼出请求体 bytes。messages / tools 都可以传已序列化好的 JSON bytes，避免每步重复序列化。"""
+        parts = [
+            b'{"model":', orjson.dumps(self.cfg.model),
+            b',"messages":', messages if isinstance(messages, bytes) else orjson.dumps(messages),
+            b',"temperature":', orjson.dumps(temperature),
+        ]
+        if tools is not None:
+            parts += [b',"tools":', tools if isinstance(tools, bytes) else orjson.dumps(tools)]
+            if tool_choice is not None:
+                parts += [b',"tool_choice":', orjson.dumps(tool_choice)]
+        if stream:
+            parts.append(b',"stream":true')
+        parts.append(b"}")
+        return self._url, self._headers, b"".join(parts)
 
     async def chat_completions(
         self,
         *,
-        messages: List[Dict[str, Any]],
-        tools: Optional[List[Dict[str, Any]]] = None,
+        messages: List[Dict[str, Any]] | bytes,
+        tools: Optional[List[Dict[str, Any]] | bytes] = None,
         tool_choice: Optional[str] = "auto",
         temperature: float = 0.2,
     ) -> Dict[str, Any]:
-        url = f"{self.cfg.base_url.rstrip('/')}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.cfg.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload: Dict[str, Any] = {
-            "model": self.cfg.model,
-            "messages": messages,
-            "temperature": temperature,
-        }
-        if tools is not None:
-            payload["tools"] = tools
-        if tool_choice is not None and tools is not None:
-            payload["tool_choice"] = tool_choice
+        url, headers, body = self._build_request(messages, tools, tool_choice, temperature)
 
-        resp = await self.client.post(url, headers=headers, json=payload)
+        resp = await self.client.post(url, headers=headers, content=body)
         if resp.status_code // 100 != 2:
             raise RuntimeError(f"DeepSeek HTTP {resp.status_code}: {resp.text}")
-        return resp.json()
+        return orjson.loads(resp.content)
+
+    async def chat_completions_stream(
+        self,
+        *,
+        messages: List[Dict[str, Any]] | bytes,
+        tools: Optional[List[Dict[str, Any]] | bytes] = None,
+        tool_choice: Optional[str] = "auto",
+        temperature: float = 0.2,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """stream=true：逐条产出 DeepSeek 返回的 chunk（`data: {...}` 帧解析后的 JSON）。"""
+        url, headers, body = self._build_request(messages, tools, tool_choice, temperature, stream=True)
+
+        async with self.client.stream("POST", url, headers=headers, content=body) as resp:
+            if resp.status_code // 100 != 2:
+                err = await resp.aread()
+                raise RuntimeError(f"DeepSeek HTTP {resp.status_code}: {err.decode('utf-8', 'replace')}")
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                if data:
+                    yield orjson.loads(data)
 
 
-def _extract_message(resp_json: Dict[str, Any]) -> Dict[str, Any]:
-    choices = resp_json.get("choices") or []
-    if not choices:
-        return {}
-    return choices[0].get("message") or {}
+class _EncodedMessages:
+    """对话历史 + 每条消息的 JSON 编码缓存。
+
+    每条消息只在 append 时序列化一次，发请求时把已编码的片段拼成 JSON 数组，
+    每步的序列化成本只与新增消息有关，而不是整段历史。append 之后不要再修改消息。
+    """
+
+    def __init__(self, messages: List[Dict[str, Any]]):
+        self.items: List[Dict[str, Any]] = []
+        self._encoded: List[bytes] = []
+        for m in messages:
+            self.append(m)
+
+    def append(self, msg: Dict[str, Any]) -> None:
+        self.items.append(msg)
+        self._encoded.append(orjson.dumps(msg))
+
+    def to_json(self) -> bytes:
+        return b"[" + b",".join(self._encoded) + b"]"
 
 
 def _extract_tool_calls(msg: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -144,23 +228,194 @@ def _extract_tool_calls(msg: Dict[str, Any]) -> List[Dict[str, Any]]:
     return []
 
 
+_JSON_START_CHARS = frozenset('{["tfn-0123456789')
+
+
 def _safe_json_loads(s: str) -> Any:
-    if not s:
+    # 绝大多数 arguments 为空或 "{}"，直接返回；首字符不可能开始 JSON 时也不必走解析+异常
+    if not s or s == "{}":
         return {}
+    if s.lstrip()[:1] not in _JSON_START_CHARS:
+        return {"_raw": s}
     try:
-        return json.loads(s)
-    except Exception:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
         return {"_raw": s}
 
 
-def _sse(obj: Any, event: str | None = None) -> str:
-    data = json.dumps(obj, ensure_ascii=False)
+async def _iter_tool_results(
+    adapter: OpenAIMCPAdapter,
+    calls: List[Dict[str, Any]],
+    max_parallel: int,
+) -> AsyncGenerator[tuple[Dict[str, Any], Any], None]:
+    """并发执行同一步内的多个 tool_calls，按完成先后产出 (call, result)。
+
+    每个 call 需包含 name / args；单个工具失败不会影响其它工具，异常会转成 error 结果。
+    生成器提前退出（如客户端断开）时会取消仍在执行的工具任务。
+    """
+    sem = asyncio.Semaphore(max(1, max_parallel))
+    queue: asyncio.Queue[tuple[Dict[str, Any], Any]] = asyncio.Queue()
+
+    async def _run(call: Dict[str, Any]) -> None:
+        name = call["name"]
+        executor = adapter.tool_executors.get(name)
+        if executor is None:
+            result: Any = {
+                "error": f"tool executor not found for: {name}",
+                "available": sorted(adapter.tool_executors.keys()),
+            }
+        else:
+            args = call["args"]
+            try:
+                async with sem, _TOOL_SEM:
+                    result = await executor(args if isinstance(args, dict) else {})
+            except Exception as e:
+                result = {"error": f"tool {name} failed: {e}"}
+        queue.put_nowait((call, result))
+
+    tasks = [asyncio.create_task(_run(c)) for c in calls]
+    try:
+        for _ in range(len(tasks)):
+            yield await queue.get()
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+@dataclass
+class _MCPToolsEntry:
+    mcp: MCPClient
+    adapter: OpenAIMCPAdapter
+    tools: List[Dict[str, Any]]
+    tools_blob: bytes
+    expires_at: float
+    stop: asyncio.Event
+    task: asyncio.Task
+
+
+class _MCPToolsCache:
+    """按 server_url 缓存长连接 MCPClient 及其 tools 列表。
+
+    - 连接由一个后台任务持有（sse_client 的 cancel scope 必须在同一个 task 内进出），
+      请求只借用其中的 adapter / tool_executors
+    - tools 过期后在原连接上重新拉取；连接已断开或拉取失败时才重连
+    - asyncio.Lock 保证并发请求只触发一次刷新
+    """
+
+    def __init__(self, ttl_s: float):
+        self.ttl_s = ttl_s
+        self._entries: Dict[str, _MCPToolsEntry] = {}
+        self._lock = asyncio.Lock()
+
+    def _fresh(self, entry: Optional[_MCPToolsEntry]) -> bool:
+        return entry is not None and not entry.task.done() and time.monotonic() < entry.expires_at
+
+    async def get(self, server_url: str) -> _MCPToolsEntry:
+        entry = self._entries.get(server_url)
+        if self._fresh(entry):
+            return entry
+
+        async with self._lock:
+            entry = self._entries.get(server_url)
+            if self._fresh(entry):
+                return entry
+
+            if entry is not None and not entry.task.done() and entry.mcp.connectors:
+                # 连接还在：只在原连接上重新拉取 tools，旧 executors 依然可用
+                adapter = OpenAIMCPAdapter()
+                try:
+                    tools = await adapter.create_tools(entry.mcp)
+                except Exception:
+                    tools = []
+                if tools:
+                    entry = dataclasses.replace(
+                        entry,
+                        adapter=adapter,
+                        tools=tools,
+                        tools_blob=orjson.dumps(tools),
+                        expires_at=time.monotonic() + self.ttl_s,
+                    )
+                    self._entries[server_url] = entry
+                    return entry
+
+            if entry is not None:
+                entry.stop.set()
+                self._entries.pop(server_url, None)
+
+            entry = await self._connect(server_url)
+            if entry.tools:
+                self._entries[server_url] = entry
+            else:
+                # 没拿到 tools（MCP Server 未启动等）：不缓存，下次请求重连
+                entry.stop.set()
+            return entry
+
+    async def _connect(self, server_url: str) -> _MCPToolsEntry:
+        servers = [MCPServerMetadata(name="mcp_server", url=server_url, transport="sse")]
+        ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+
+        async def _hold() -> None:
+            try:
+                async with MCPClient(servers) as mcp:
+                    adapter = OpenAIMCPAdapter()
+                    tools = await adapter.create_tools(mcp)
+                    ready.set_result((mcp, adapter, tools))
+                    await stop.wait()
+            except Exception as e:
+                if not ready.done():
+                    ready.set_exception(e)
+
+        task = asyncio.create_task(_hold())
+        try:
+            mcp, adapter, tools = await ready
+        except BaseException:
+            stop.set()
+            raise
+        return _MCPToolsEntry(
+            mcp=mcp,
+            adapter=adapter,
+            tools=tools,
+            tools_blob=orjson.dumps(tools),
+            expires_at=time.monotonic() + self.ttl_s,
+            stop=stop,
+            task=task,
+        )
+
+    async def aclose(self) -> None:
+        entries = list(self._entries.values())
+        self._entries.clear()
+        for entry in entries:
+            entry.stop.set()
+        await asyncio.gather(*(e.task for e in entries), return_exceptions=True)
+
+
+_MCP_TOOLS = _MCPToolsCache(ttl_s=float(os.getenv("MCP_TOOLS_TTL_S", str(DEFAULT_MCP_TOOLS_TTL_S))))
+
+
+def _sse(obj: Any, event: str | None = None) -> bytes:
+    # 直接产出 bytes，StreamingResponse 无需再做一次 UTF-8 编码
+    data = orjson.dumps(obj)
     if event:
-        return f"event: {event}\ndata: {data}\n\n"
-    return f"data: {data}\n\n"
+        return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+    return b"data: " + data + b"\n\n"
+
 
+def _sse_compressed(obj: Any, compress: bool) -> bytes:
+    """大事件 gzip 压缩后以 {"type": "blob_gz", "data": base64} 推送，由前端解压还原成原事件。
 
-async def _chat_sse(request: Request) -> AsyncGenerator[str, None]:
+    SSE 流经 GZipMiddleware 时需逐帧 flush，压缩率很差，所以这里按事件单独压缩。
+    """
+    if not compress:
+        return _sse(obj)
+    data = orjson.dumps(obj)
+    if len(data) < SSE_COMPRESS_MIN_BYTES:
+        return b"data: " + data + b"\n\n"
+    blob = base64.b64encode(gzip.compress(data, compresslevel=1))
+    return b'data: {"type":"blob_gz","data":"' + blob + b'"}\n\n'
+
+
+async def _chat_sse(request: Request) -> AsyncGenerator[bytes, None]:
     params = request.query_params
     query = (params.get("query") or "").strip()
     if not query:
@@ -169,9 +424,12 @@ async def _chat_sse(request: Request) -> AsyncGenerator[str, None]:
 
     server_url = (params.get("server_url") or DEFAULT_MCP_SERVER_URL).strip()
     max_steps = int(params.get("max_steps") or 8)
+    max_parallel_tools = int(params.get("max_parallel_tools") or DEFAULT_MAX_PARALLEL_TOOLS)
     verbose = (params.get("verbose") or "0") in {"1", "true", "True"}
+    # 仅对声明能解压（compress=1）的前端、且 verbose 模式下的大事件启用
+    compress = verbose and (params.get("compress") or "0") in {"1", "true", "True"}
 
-    env_yaml = _load_env_yaml("env.yaml")
+    env_yaml = load_env_yaml("env.yaml") or {}
     api_key = _get_config_value("DEEPSEEK_API_KEY", env_yaml)
     if not api_key:
         yield _sse({"type": "error", "message": "缺少 DEEPSEEK_API_KEY（请设置环境变量或 env.yaml）"})
@@ -190,95 +448,102 @@ async def _chat_sse(request: Request) -> AsyncGenerator[str, None]:
         }
     )
 
-    servers = [MCPServerMetadata(name="mcp_server", url=server_url, transport="sse")]
-    adapter = OpenAIMCPAdapter()
-
-    llm = DeepSeekOpenAICompat(DeepSeekConfig(api_key=api_key, base_url=base_url, model=model))
+    llm = DeepSeekOpenAICompat(
+        DeepSeekConfig(api_key=api_key, base_url=base_url, model=model),
+        client=_get_llm_client(),
+    )
 
     try:
-        async with MCPClient(servers) as mcp:
-            yield _sse({"type": "status", "message": "连接 MCP Server 并拉取 tools..."})
-            tools = await adapter.create_tools(mcp)
-            yield _sse({"type": "tools", "count": len(tools), "tools": tools if verbose else None})
+        yield _sse({"type": "status", "message": "连接 MCP Server 并拉取 tools..."})
+        mcp_entry = await _MCP_TOOLS.get(server_url)
+        adapter, tools = mcp_entry.adapter, mcp_entry.tools
+        yield _sse_compressed({"type": "tools", "count": len(tools), "tools": tools if verbose else None}, compress)
 
-            if not tools:
-                yield _sse(
-                    {
-                        "type": "error",
-                        "message": "未获取到任何 MCP tools：请确认 MCP Server（SSE）已启动，且 server_url 指向正确地址。",
-                    }
-                )
+        if not tools:
+            yield _sse(
+                {
+                    "type": "error",
+                    "message": "未获取到任何 MCP tools：请确认 MCP Server（SSE）已启动，且 server_url 指向正确地址。",
+                }
+            )
+            return
+
+        # tools 在整个闭环中不变：缓存里已序列化好，每步直接拼进请求体
+        tools_blob = mcp_entry.tools_blob
+
+        messages = _EncodedMessages([
+            {
+                "role": "system",
+                "content": (
+                    "你是一个金融助手。你可以通过可用工具获取实时数据、新闻、风险评分、异常检测、预测等。"
+                    "当需要外部数据时，优先调用工具；拿到工具结果后再给出结论。"
+                    "输出请用中文，结构清晰。"
+                ),
+            },
+            {"role": "user", "content": query},
+        ])
+
+        for step in range(1, max_steps + 1):
+            if await request.is_disconnected():
                 return
 
-            messages: List[Dict[str, Any]] = [
-                {
-                    "role": "system",
-                    "content": (
-                        "你是一个金融助手。你可以通过可用工具获取实时数据、新闻、风险评分、异常检测、预测等。"
-                        "当需要外部数据时，优先调用工具；拿到工具结果后再给出结论。"
-                        "输出请用中文，结构清晰。"
-                    ),
-                },
-                {"role": "user", "content": query},
-            ]
+            req_preview = {
+                "model": model,
+                "messages": messages.items,
+                "tools_count": len(tools),
+                "tool_choice": "auto",
+            }
+            yield _sse_compressed({"type": "deepseek_request", "step": step, "preview": req_preview if verbose else {"model": model, "tools_count": len(tools)}}, compress)
+
+            msg: Dict[str, Any] = {"role": "assistant", "content": ""}
+            received = False
+            async for chunk in llm.chat_completions_stream(messages=messages.to_json(), tools=tools_blob, tool_choice="auto"):
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                received = True
+                delta = choices[0].get("delta") or {}
+                merge_stream_delta(msg, delta)
+                if delta.get("content"):
+                    yield _sse({"type": "delta", "step": step, "content": delta["content"]})
+            if not received:
+                yield _sse({"type": "error", "message": "DeepSeek 返回空 message"})
+                return
 
-            for step in range(1, max_steps + 1):
-                if await request.is_disconnected():
-                    return
+            tool_calls = _extract_tool_calls(msg)
+            yield _sse_compressed({"type": "deepseek_response", "step": step, "message": msg if verbose else {"role": msg.get("role"), "content": msg.get("content"), "tool_calls": tool_calls}}, compress)
 
-                req_preview = {
-                    "model": model,
-                    "messages": messages,
-                    "tools_count": len(tools),
-                    "tool_choice": "auto",
-                }
-                yield _sse({"type": "deepseek_request", "step": step, "preview": req_preview if verbose else {"model": model, "tools_count": len(tools)}})
+            if not tool_calls:
+                final_text = (msg.get("content") or "").strip()
+                yield _sse({"type": "final", "content": final_text})
+                return
 
-                resp_json = await llm.chat_completions(messages=messages, tools=tools, tool_choice="auto")
-                msg = _extract_message(resp_json)
-                if not msg:
-                    yield _sse({"type": "error", "message": "DeepSeek 返回空 message"})
-                    return
+            messages.append(msg)
 
-                tool_calls = _extract_tool_calls(msg)
-                yield _sse({"type": "deepseek_response", "step": step, "message": msg if verbose else {"role": msg.get("role"), "content": msg.get("content"), "tool_calls": tool_calls}})
+            calls: List[Dict[str, Any]] = []
+            for call in tool_calls:
+                fn = (call.get("function") or {})
+                name = fn.get("name")
+                args_str = fn.get("arguments") or "{}"
+                args = _safe_json_loads(args_str)
+                call_id = call.get("id") or f"call_{step}"
+                calls.append({"id": call_id, "name": name, "args": args})
 
-                if not tool_calls:
-                    final_text = (msg.get("content") or "").strip()
-                    yield _sse({"type": "final", "content": final_text})
-                    return
+                yield _sse({"type": "tool_call", "name": name, "arguments": args, "raw_arguments": args_str})
 
-                messages.append(msg)
-
-                for call in tool_calls:
-                    fn = (call.get("function") or {})
-                    name = fn.get("name")
-                    args_str = fn.get("arguments") or "{}"
-                    args = _safe_json_loads(args_str)
-                    call_id = call.get("id") or f"call_{step}"
-
-                    yield _sse({"type": "tool_call", "name": name, "arguments": args, "raw_arguments": args_str})
-
-                    executor = adapter.tool_executors.get(name)
-                    if executor is None:
-                        tool_result: Any = {
-                            "error": f"tool executor not found for: {name}",
-                            "available": sorted(adapter.tool_executors.keys()),
-                        }
-                    else:
-                        tool_result = await executor(args if isinstance(args, dict) else {})
-
-                    yield _sse({"type": "tool_result", "name": name, "result": tool_result})
-
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": call_id,
-                            "content": json.dumps(tool_result, ensure_ascii=False),
-                        }
-                    )
+            # 工具结果按完成顺序推送：先完成的先写回，不必等最慢的那个
+            async for call, tool_result in _iter_tool_results(adapter, calls, max_parallel_tools):
+                yield _sse({"type": "tool_result", "name": call["name"], "result": tool_result})
+
+                messages.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": call["id"],
+                        "content": orjson.dumps(tool_result).decode(),
+                    }
+                )
 
-            yield _sse({"type": "error", "message": f"达到 max_steps={max_steps} 仍未结束（可能进入循环调用）"})
+        yield _sse({"type": "error", "message": f"达到 max_steps={max_steps} 仍未结束（可能进入循环调用）"})
 
     except Exception as e:
         yield _sse({"type": "error", "message": str(e)})
@@ -286,48 +551,36 @@ async def _chat_sse(request: Request) -> AsyncGenerator[str, None]:
         await llm.aclose()
 
 
+_NO_CACHE_HEADERS = {
+    "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+# 静态文件在进程内不会增删：启动时确定一次是否存在，请求路径上不再额外 stat
+_STATIC_FILES: Dict[str, Optional[Path]] = {
+    name: (WEB_DIR / name) if (WEB_DIR / name).is_file() else None
+    for name in ("index.html", "app.js", "style.css")
+}
+
+
+def _serve_static(name: str, media_type: Optional[str] = None):
+    path = _STATIC_FILES.get(name)
+    if path is None:
+        return PlainTextResponse(f"web/{name} not found", status_code=404)
+    return FileResponse(path, media_type=media_type, headers=_NO_CACHE_HEADERS)
+
+
 async def serve_index(_: Request):
-    index = WEB_DIR / "index.html"
-    if not index.exists():
-        return PlainTextResponse("web/index.html not found", status_code=404)
-    return FileResponse(
-        index,
-        headers={
-            "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        },
-    )
+    return _serve_static("index.html")
 
 
 async def serve_app_js(_: Request):
-    path = WEB_DIR / "app.js"
-    if not path.exists():
-        return PlainTextResponse("web/app.js not found", status_code=404)
-    return FileResponse(
-        path,
-        media_type="text/javascript",
-        headers={
-            "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        },
-    )
+    return _serve_static("app.js", "text/javascript")
 
 
 async def serve_style(_: Request):
-    path = WEB_DIR / "style.css"
-    if not path.exists():
-        return PlainTextResponse("web/style.css not found", status_code=404)
-    return FileResponse(
-        path,
-        media_type="text/css",
-        headers={
-            "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        },
-    )
+    return _serve_static("style.css", "text/css")
 
 
 async def api_chat(request: Request):
@@ -341,6 +594,14 @@ async def api_chat(request: Request):
     )
 
 
+@contextlib.asynccontextmanager
+async def _lifespan(_: Starlette):
+    yield
+    await _MCP_TOOLS.aclose()
+    if _LLM_CLIENT is not None:
+        await _LLM_CLIENT.aclose()
+
+
 def create_app() -> Starlette:
     app = Starlette(
         routes=[
@@ -348,7 +609,8 @@ def create_app() -> Starlette:
             Route("/app.js", serve_app_js),
             Route("/style.css", serve_style),
             Route("/api/chat", api_chat),
-        ]
+        ],
+        lifespan=_lifespan,
     )
 
     app.add_middleware(
@@ -366,4 +628,5 @@ app = create_app()
 if __name__ == "__main__":
     host = os.getenv("BRIDGE_HOST", "127.0.0.1")
     port = int(os.getenv("BRIDGE_PORT", "19500"))
-    uvicorn.run(app, host=host, port=port)
+    # auto：已安装时使用 uvloop（非 Windows）+ httptools，否则退回 asyncio + h11
+    uvicorn.run(app, host=host, port=port, loop="auto", http="auto")
@@ -3,10 +3,17 @@
 封装 Amazon Chronos-Bolt 模型进行时间序列预测
 """
 import os
+import asyncio
+import threading
+
+# 长时间运行时 predict 的输入长度不固定，默认的缓存分配器容易碎片化并触发同步的 cudaFree；
+# expandable_segments 需 CUDA 11.3+，且必须在 import torch 之前设置（用户已设置时不覆盖）
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,garbage_collection_threshold:0.8")
+
 import torch
 import numpy as np
 import pandas as pd
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 import logging
 from transformers import AutoModelForSeq2SeqLM, AutoConfig
 
@@ -18,29 +25,94 @@ except ImportError:
 
 logger = logging.getLogger("core.predictor")
 
+# 进程级模型缓存：key 为 (model_name, device, dtype, quantize, compile)
+# 同配置的 FinancialPredictor 实例共享同一个 pipeline（只读使用，调用方不要修改其状态）
+_PIPELINE_CACHE: Dict[tuple, "BaseChronosPipeline"] = {}
+_PIPELINE_LOCK = threading.Lock()
+
+# predict_async 动态批处理参数：单批最多序列数 / 攒批等待窗口
+MAX_BATCH_SIZE = int(os.getenv("PREDICTOR_MAX_BATCH", "16"))
+MAX_BATCH_WAIT_MS = float(os.getenv("PREDICTOR_MAX_WAIT_MS", "10"))
+# CUDA 锁页暂存缓冲区大小（float32 元素数）：足够放下一个满批的 4096 长度序列
+PINNED_BUFFER_SIZE = 4096 * MAX_BATCH_SIZE
+# 启用 torch.compile 时 batch 补齐到固定档位：编译出的图（CUDA Graph）数量有上限，
+# 不会因每个新的 batch 大小重新编译
+BATCH_BUCKETS = tuple(sorted({b for b in (1, 2, 4, 8, 16, 32, 64) if b < MAX_BATCH_SIZE} | {MAX_BATCH_SIZE}))
+
+
+def _bucket_size(n: int) -> int:
+    """不小于 n 的最小档位（超过最大档位时原样返回）"""
+    for size in BATCH_BUCKETS:
+        if size >= n:
+            return size
+    return n
+
 class FinancialPredictor:
     """金融时间序列预测器"""
     
-    def __init__(self, model_name: str = "amazon/chronos-bolt-tiny", device: str = None):
+    def __init__(self, model_name: str = "amazon/chronos-bolt-tiny", device: str = None,
+                 compile_model: Optional[bool] = None, quantize: bool = False):
         """
         初始化预测器
         
         Args:
             model_name: 模型名称，默认使用 lightest 的 tiny 版本
             device: 运行设备 ('cpu' or 'cuda')，默认自动检测
+            compile_model: 是否用 torch.compile 编译模型，默认仅在 CUDA 上开启（CPU 上编译耗时远大于收益）
+            quantize: 是否对 Linear 层做 int8 动态量化（仅 CPU 生效，对精度敏感的场景保持关闭）
         """
         self.model_name = model_name
         self.pipeline = None
+        self.torch_dtype = None
         
         if device:
             self.device = device
         else:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        # CUDA 上复用的锁页暂存缓冲区：H2D 拷贝可异步进行，省去驱动内部的中转拷贝
+        self._host_buf = None
+        if self.device.startswith("cuda") and torch.cuda.is_available():
+            self._host_buf = torch.empty(PINNED_BUFFER_SIZE, dtype=torch.float32, pin_memory=True)
+        self._infer_lock = threading.Lock()
+        # predict_async 的批处理队列，首次调用时在当前事件循环上创建
+        self._batch_queue = None
+        self._batch_loop = None
+        self._batch_task = None
+        
+        if compile_model is None:
+            compile_model = self.device.startswith("cuda")
+        self.compile_model = compile_model and hasattr(torch, "compile")  # torch.compile 需要 torch>=2.0
+        self.quantize = quantize
+        if quantize and self.device.startswith("cuda"):
+            logger.warning("int8 动态量化仅支持 CPU，CUDA 上将忽略 quantize 参数")
             
         logger.info(f"FinancialPredictor 初始化 (Device: {self.device})")
 
-    def _load_model(self):
-        """延迟加载模型"""
+    def _select_dtype(self) -> torch.dtype:
+        """
+        按设备选择推理精度
+        - CUDA: SM80+（Ampere 及以后）原生支持 BF16；更老的卡上 BF16 是模拟实现，改用 FP16
+        - CPU: 仅在有 AVX512-BF16 / AMX 指令时使用 BF16，否则保持 FP32
+        """
+        if self.device.startswith("cuda"):
+            index = torch.device(self.device).index
+            major, _ = torch.cuda.get_device_capability(index)
+            return torch.bfloat16 if major >= 8 else torch.float16
+
+        # torch.cpu 的能力探测函数是私有 API，旧版本 torch 上可能不存在
+        cpu_bf16 = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+        cpu_amx = getattr(torch.cpu, "_is_amx_tile_supported", None)
+        if (cpu_bf16 is not None and cpu_bf16()) or (cpu_amx is not None and cpu_amx()):
+            return torch.bfloat16
+        return torch.float32
+
+    def _load_model(self, warmup_shape: Optional[tuple] = None):
+        """
+        延迟加载模型
+        warmup_shape 为 (context_length, prediction_length) 时，启用 torch.compile 的新模型
+        会在放入缓存前先预热，其他实例等锁结束后直接复用已编译的 pipeline
+        """
         if self.pipeline is not None:
             return
 
@@ -49,20 +121,93 @@ class FinancialPredictor:
                 "未找到 chronos-forecasting 库。请运行 `pip install chronos-forecasting` 安装。"
             )
 
+        # 动态量化要求 FP32 权重
+        torch_dtype = torch.float32 if self._use_quantization() else self._select_dtype()
+        self.torch_dtype = torch_dtype
+        key = (self.model_name, self.device, torch_dtype, self._use_quantization(), self.compile_model)
+
+        with _PIPELINE_LOCK:
+            cached = _PIPELINE_CACHE.get(key)
+            if cached is not None:
+                self.pipeline = cached
+                return
+
+            try:
+                logger.info(f"正在加载模型: {self.model_name} ...")
+                logger.info(f"推理精度: {torch_dtype}")
+
+                self.pipeline = BaseChronosPipeline.from_pretrained(
+                    self.model_name,
+                    device_map=self.device,
+                    torch_dtype=torch_dtype,
+                )
+                if self._use_quantization():
+                    self._quantize()
+                if self.compile_model:
+                    self._compile()
+                    if warmup_shape is not None:
+                        self._warmup(*warmup_shape)
+                _PIPELINE_CACHE[key] = self.pipeline
+                logger.info("模型加载完成")
+            except Exception as e:
+                logger.error(f"模型加载失败: {e}")
+                raise e
+
+    def release(self):
+        """释放模型并归还缓存的显存（只在显式释放时调用，不要放在预测热路径中）"""
+        with _PIPELINE_LOCK:
+            for key in [k for k, v in _PIPELINE_CACHE.items() if v is self.pipeline]:
+                del _PIPELINE_CACHE[key]
+        self.pipeline = None
+        if self.device.startswith("cuda") and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _use_quantization(self) -> bool:
+        return self.quantize and not self.device.startswith("cuda")
+
+    def _quantize(self):
+        """
+        CPU 上对 Linear 层做 int8 动态量化（权重 int8，激活运行时量化）
+        CPU 推理主要受权重读取带宽限制，int8 权重读取量约为 FP32 的 1/4
+        """
         try:
-            logger.info(f"正在加载模型: {self.model_name} ...")
-            # 使用 bfloat16 加速推理 (如果硬件支持)
-            torch_dtype = torch.bfloat16 if self.device == "cuda" or (self.device == "cpu" and torch.cuda.is_bf16_supported()) else torch.float32
-            
-            self.pipeline = BaseChronosPipeline.from_pretrained(
-                self.model_name,
-                device_map=self.device,
-                torch_dtype=torch_dtype,
+            self.pipeline.model = torch.ao.quantization.quantize_dynamic(
+                self.pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
             )
-            logger.info("模型加载完成")
+            logger.info("模型已启用 int8 动态量化")
         except Exception as e:
-            logger.error(f"模型加载失败: {e}")
-            raise e
+            logger.warning(f"int8 量化失败，使用原始权重: {e}")
+
+    def _compile(self):
+        """
+        用 torch.compile 编译底层模型
+        CUDA 上使用 reduce-overhead（CUDA Graph），消除小 batch 下的 kernel launch 开销；
+        编译失败时保留 eager 模型，不影响预测
+        """
+        mode = "reduce-overhead" if self.device.startswith("cuda") else "default"
+        try:
+            self.pipeline.model = torch.compile(self.pipeline.model, mode=mode, fullgraph=False, dynamic=False)
+            logger.info(f"模型已启用 torch.compile (mode={mode})")
+        except Exception as e:
+            logger.warning(f"torch.compile 失败，使用 eager 模式: {e}")
+
+    def warmup(self, context_length: int = 100, prediction_length: int = 5):
+        """
+        预热：加载模型，启用 torch.compile 时对每个 batch 档位用与线上一致的输入形状各跑一次预测，
+        提前触发编译/图捕获；之后相同形状的调用直接复用已编译的图
+        （compact 模式的日线历史固定为 100 条，工具默认预测 5 天）
+        """
+        self._load_model(warmup_shape=(context_length, prediction_length))
+
+    def _warmup(self, context_length: int, prediction_length: int):
+        """在已编译的模型上按每个 batch 档位各跑一次预测；失败只记录日志，不影响模型加载"""
+        try:
+            context = torch.ones(context_length, dtype=torch.float32)
+            for size in BATCH_BUCKETS:
+                self._predict_batch([context] * size, prediction_length)
+            logger.info(f"模型预热完成 (context={context_length}, prediction={prediction_length}, batch={BATCH_BUCKETS})")
+        except Exception as e:
+            logger.warning(f"模型预热失败: {e}")
 
     def predict(self, 
                 context: Union[List[float], np.ndarray, pd.Series], 
@@ -85,46 +230,137 @@ class FinancialPredictor:
                 'upper_80': List[float]  # 90% 分位数
             }
         """
-        self._load_model()
-        
-        # 数据预处理
-        if isinstance(context, list):
-            context_tensor = torch.tensor(context)
-        elif isinstance(context, np.ndarray):
-            context_tensor = torch.from_numpy(context)
-        elif isinstance(context, pd.Series):
-            context_tensor = torch.tensor(context.values)
+        return self._predict_batch([self._to_tensor(context)], prediction_length)[0]
+
+    async def predict_async(self,
+                            context: Union[List[float], np.ndarray, pd.Series],
+                            prediction_length: int = 12,
+                            num_samples: int = 20) -> dict:
+        """
+        异步预测（动态批处理）
+        并发到达的请求在 MAX_BATCH_WAIT_MS 窗口内合并成一个 batch，只做一次模型前向；
+        推理在线程池中执行，不阻塞事件循环。参数与返回值同 predict
+        """
+        loop = asyncio.get_running_loop()
+        if self._batch_queue is None or self._batch_loop is not loop:
+            self._batch_queue = asyncio.Queue()
+            self._batch_loop = loop
+            self._batch_task = None
+
+        future = loop.create_future()
+        self._batch_queue.put_nowait((self._to_tensor(context), prediction_length, future))
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_task = loop.create_task(self._batch_worker())
+        return await future
+
+    async def _batch_worker(self):
+        """从队列中攒批并执行，队列清空后退出（下次 predict_async 时重新启动）"""
+        loop = asyncio.get_running_loop()
+        queue = self._batch_queue
+        while not queue.empty():
+            batch = [queue.get_nowait()]
+            deadline = loop.time() + MAX_BATCH_WAIT_MS / 1000
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 预测步长不同的请求无法共用一次前向，按步长分组
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+
+            for prediction_length, items in groups.items():
+                try:
+                    results = await asyncio.to_thread(
+                        self._predict_batch, [tensor for tensor, _, _ in items], prediction_length
+                    )
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+    def _to_tensor(self, context: Union[List[float], np.ndarray, pd.Series]) -> torch.Tensor:
+        """把输入序列转换成 float32 的一维 tensor（输入已是 float32 数组时零拷贝）"""
+        if isinstance(context, pd.Series):
+            arr = context.to_numpy(dtype=np.float32, copy=False)
+        elif isinstance(context, (list, np.ndarray)):
+            arr = np.asarray(context, dtype=np.float32)
         else:
             raise ValueError("不支持的输入数据类型")
-            
-        # 确保数据是浮点型
-        context_tensor = context_tensor.float()
+        return torch.from_numpy(arr)
+
+    @torch.inference_mode()
+    def _predict_batch(self, contexts: List[torch.Tensor], prediction_length: int) -> List[dict]:
+        """对一组序列执行一次模型前向，返回与 contexts 一一对应的预测结果"""
+        self._load_model()
+        
+        # FP32 时不需要 autocast
+        device_type = "cuda" if self.device.startswith("cuda") else "cpu"
+        use_autocast = self.torch_dtype in (torch.bfloat16, torch.float16)
+        
+        # 编译后的模型按固定档位补齐 batch（重复最后一条序列），多出的结果直接丢弃
+        count = len(contexts)
+        if self.compile_model:
+            contexts = contexts + [contexts[-1]] * (_bucket_size(count) - count)
+        
+        # 锁覆盖 暂存 -> 推理 -> 拷回 全过程：拷回 CPU 时同步，之后暂存缓冲区才能被下一次调用复用
+        with self._infer_lock:
+            return self._run_pipeline(contexts, prediction_length, device_type, use_autocast)[:count]
+
+    def _stage_inputs(self, contexts: List[torch.Tensor]):
+        """把输入放到模型所在设备，CUDA 上经由锁页暂存缓冲区异步上传"""
+        lengths = {c.shape[0] for c in contexts}
+        if len(lengths) != 1:
+            # 不等长时交给 Chronos 左侧补 NaN 对齐
+            return [c.to(self.device, non_blocking=True) for c in contexts]
+
+        # 等长序列直接堆叠成 [B, T]
+        shape = (len(contexts), lengths.pop())
+        numel = shape[0] * shape[1]
+        if self._host_buf is not None and numel <= self._host_buf.numel():
+            staged = self._host_buf[:numel].view(shape)
+            torch.stack(contexts, out=staged)
+            return staged.to(self.device, non_blocking=True)
+        return torch.stack(contexts).to(self.device, non_blocking=True)
+
+    def _run_pipeline(self, contexts: List[torch.Tensor], prediction_length: int,
+                      device_type: str, use_autocast: bool) -> List[dict]:
+        inputs = self._stage_inputs(contexts)
         
         try:
             # 执行预测
             # Bolt returns quantiles directly: [batch_size, num_quantiles, prediction_length]
-            forecast = self.pipeline.predict(
-                inputs=context_tensor,  # 使用正确的参数名 inputs
-                prediction_length=prediction_length,
-                limit_prediction_length=False
-            )
+            with torch.autocast(device_type=device_type, dtype=self.torch_dtype, enabled=use_autocast):
+                forecast = self.pipeline.predict(
+                    inputs=inputs,  # 使用正确的参数名 inputs
+                    prediction_length=prediction_length,
+                    limit_prediction_length=False
+                )
             
-            # 提取统计特征 (取第一个序列，因为我们输入是单个序列)
-            forecast_samples = forecast[0].numpy() # shape: [num_quantiles, prediction_length]
             # Quantiles: 0.1, 0.2, ..., 0.9 (9 quantiles default)
+            # 先在设备上切出需要的 3 个分位数，再一次性拷回 CPU，只传输 3/9 的数据
+            quantiles = forecast[:, [0, 4, 8]].to("cpu", torch.float32).numpy() # shape: [B, 3, prediction_length]
             
-            # Mapping quantiles to our expected stats
-            median = forecast_samples[4] # 0.5 quantile
-            lower_80 = forecast_samples[0] # 0.1 quantile
-            upper_80 = forecast_samples[8] # 0.9 quantile
-            mean = median # Approximate mean with median for quantile forecasts
-            
-            return {
-                "mean": mean.tolist(),
-                "median": median.tolist(),
-                "lower_80": lower_80.tolist(),
-                "upper_80": upper_80.tolist()
-            }
+            results = []
+            # Mapping quantiles to our expected stats (一次 tolist 完成全部转换)
+            for lower_80, median, upper_80 in quantiles.tolist(): # 0.1 / 0.5 / 0.9 quantile
+                mean = median # Approximate mean with median for quantile forecasts (共享同一个 list，调用方只读)
+                results.append({
+                    "mean": mean,
+                    "median": median,
+                    "lower_80": lower_80,
+                    "upper_80": upper_80
+                })
+            return results
             
         except Exception as e:
             logger.error(f"预测过程出错: {e}")
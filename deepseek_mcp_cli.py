@@ -12,6 +12,8 @@
 用法示例：
   python deepseek_mcp_cli.py --query "查询 AAPL 最新价格并分析风险"
 
+已安装 uvloop 时（非 Windows）自动使用 uvloop 事件循环。
+
 环境变量（也支持在 env.yaml 中配置同名键）：
   DEEPSEEK_API_KEY
   DEEPSEEK_BASE_URL   (默认 https://api.deepseek.com/v1)
@@ -22,24 +24,37 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import json
 import os
 import sys
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
+import anyio
 import httpx
-import yaml
+import orjson
 
 from modules.YA_Common.mcp.mcp_client import MCPClient
 from modules.YA_Common.mcp.openai_adapter import OpenAIMCPAdapter
 from modules.YA_Common.types.mcp import MCPServerMetadata
+from YA_Agent._env import load_env_yaml
+from YA_Agent._stream import merge_stream_delta
 
 
 DEFAULT_SERVER_URL = "http://127.0.0.1:19420/"
 DEFAULT_DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
 DEFAULT_DEEPSEEK_MODEL = "deepseek-chat"
 DEFAULT_TIMEOUT_S = 60.0
+# 写回对话历史的单条工具结果上限：超出时只保留首尾各 TOOL_CONTENT_KEEP_CHARS 个字符
+MAX_TOOL_CHARS = 8192
+TOOL_CONTENT_KEEP_CHARS = 2048
+# MCP 会话断开（SSE 连接被服务端关闭、网络中断等）后调用工具抛出的异常，交互模式下据此重连
+_MCP_CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+)
 
 
 def _redact(s: str, keep_last: int = 4) -> str:
@@ -50,19 +65,6 @@ def _redact(s: str, keep_last: int = 4) -> str:
     return "*" * (len(s) - keep_last) + s[-keep_last:]
 
 
-def _load_env_yaml(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
-        if not isinstance(data, dict):
-            return {}
-        return data
-    except Exception:
-        return {}
-
-
 def _get_config_value(key: str, env_yaml: Dict[str, Any], default: Optional[str] = None) -> Optional[str]:
     v = os.getenv(key)
     if v is not None and str(v).strip() != "":
@@ -72,8 +74,10 @@ def _get_config_value(key: str, env_yaml: Dict[str, Any], default: Optional[str]
     return default
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DeepSeekConfig:
+    """启动时解析一次的 DeepSeek 配置，之后只读共享。"""
+
     api_key: str
     base_url: str
     model: str
@@ -84,7 +88,17 @@ class DeepSeekOpenAICompat:
 
     def __init__(self, cfg: DeepSeekConfig, timeout_s: float = DEFAULT_TIMEOUT_S):
         self.cfg = cfg
-        self.client = httpx.AsyncClient(timeout=timeout_s)
+        self._url = f"{cfg.base_url.rstrip('/')}/chat/completions"
+        # HTTP/2 + keep-alive：闭环内多次请求复用同一条 TLS 连接；鉴权头放在 client 上，不必每次重建
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout_s,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16, keepalive_expiry=60.0),
+            headers={
+                "Authorization": f"Bearer {cfg.api_key}",
+                "Content-Type": "application/json",
+            },
+        )
 
     async def close(self) -> None:
         await self.client.aclose()
@@ -97,11 +111,46 @@ class DeepSeekOpenAICompat:
         tool_choice: Optional[str] = "auto",
         temperature: float = 0.2,
     ) -> Dict[str, Any]:
-        url = f"{self.cfg.base_url.rstrip('/')}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.cfg.api_key}",
-            "Content-Type": "application/json",
-        }
+        payload = self._build_payload(messages, tools, tool_choice, temperature)
+
+        resp = await self.client.post(self._url, content=orjson.dumps(payload))
+        # DeepSeek 一般会返回 JSON；非 2xx 直接把 body 打出来方便排查
+        if resp.status_code // 100 != 2:
+            raise RuntimeError(f"DeepSeek HTTP {resp.status_code}: {resp.text}")
+        return orjson.loads(resp.content)
+
+    async def chat_completions_stream(
+        self,
+        *,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = "auto",
+        temperature: float = 0.2,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """stream=true：逐条产出 DeepSeek 返回的 chunk（`data: {...}` 帧解析后的 JSON）。"""
+        payload = self._build_payload(messages, tools, tool_choice, temperature)
+        payload["stream"] = True
+
+        async with self.client.stream("POST", self._url, content=orjson.dumps(payload)) as resp:
+            if resp.status_code // 100 != 2:
+                body = await resp.aread()
+                raise RuntimeError(f"DeepSeek HTTP {resp.status_code}: {body.decode('utf-8', 'replace')}")
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                if data:
+                    yield orjson.loads(data)
+
+    def _build_payload(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: Optional[str],
+        temperature: float,
+    ) -> Dict[str, Any]:
         payload: Dict[str, Any] = {
             "model": self.cfg.model,
             "messages": messages,
@@ -111,17 +160,12 @@ class DeepSeekOpenAICompat:
             payload["tools"] = tools
         if tool_choice is not None and tools is not None:
             payload["tool_choice"] = tool_choice
-
-        resp = await self.client.post(url, headers=headers, json=payload)
-        # DeepSeek 一般会返回 JSON；非 2xx 直接把 body 打出来方便排查
-        if resp.status_code // 100 != 2:
-            raise RuntimeError(f"DeepSeek HTTP {resp.status_code}: {resp.text}")
-        return resp.json()
+        return payload
 
 
 def _pretty(obj: Any) -> str:
     try:
-        return json.dumps(obj, ensure_ascii=False, indent=2)
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
     except Exception:
         return str(obj)
 
@@ -161,20 +205,13 @@ def _safe_json_loads(s: str) -> Dict[str, Any]:
     if not s:
         return {}
     try:
-        return json.loads(s)
-    except Exception:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
         # 有些模型会返回非严格 JSON，这里兜底
         return {"_raw": s}
 
 
-async def run_closed_loop(
-    *,
-    query: str,
-    server_url: str,
-    deepseek_cfg: DeepSeekConfig,
-    max_steps: int,
-    verbose: bool,
-) -> str:
+def _print_banner(server_url: str, deepseek_cfg: DeepSeekConfig) -> None:
     print("=" * 80)
     print("DeepSeek ↔ MCP 闭环客户端启动")
     print(f"MCP Server URL: {server_url}")
@@ -183,109 +220,183 @@ async def run_closed_loop(
     print(f"DeepSeek api_key: {_redact(deepseek_cfg.api_key)}")
     print("=" * 80)
 
-    servers = [
-        MCPServerMetadata(name="mcp_server", url=server_url, transport="sse")
-    ]
 
-    adapter = OpenAIMCPAdapter()
+def _truncate_tool_content(content: str) -> str:
+    """截断过长的工具结果，避免对话历史（及每轮请求体）随工具输出无限膨胀。"""
+    if len(content) <= MAX_TOOL_CHARS:
+        return content
+    omitted = len(content) - 2 * TOOL_CONTENT_KEEP_CHARS
+    return (
+        content[:TOOL_CONTENT_KEEP_CHARS]
+        + f"...[truncated {omitted} chars]..."
+        + content[-TOOL_CONTENT_KEEP_CHARS:]
+    )
 
-    async with MCPClient(servers) as mcp:
-        print("[1/5] 连接 MCP Server 并拉取 tools...")
-        tools = await adapter.create_tools(mcp)
 
-        print(f"已发现 tools: {len(tools)}")
+async def _call_tool(adapter: OpenAIMCPAdapter, name: str, args: Any) -> Any:
+    executor = adapter.tool_executors.get(name)
+    if executor is None:
+        return {
+            "error": f"tool executor not found for: {name}",
+            "available": sorted(adapter.tool_executors.keys()),
+        }
+    return await executor(args if isinstance(args, dict) else {})
+
+
+async def _stream_assistant_message(
+    llm: DeepSeekOpenAICompat,
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]],
+    adapter: OpenAIMCPAdapter,
+) -> tuple[Dict[str, Any], Dict[int, asyncio.Task]]:
+    """流式接收一条 assistant message。
+
+    某个 tool_call 的 arguments 一旦拼成合法 JSON 就立即调度执行（模型仍在生成后续内容），
+    返回完整 message 以及按 tool_call 下标索引的已启动任务。
+    """
+    msg: Dict[str, Any] = {"role": "assistant", "content": ""}
+    started: Dict[int, asyncio.Task] = {}
+    received = False
+    try:
+        async for chunk in llm.chat_completions_stream(messages=messages, tools=tools, tool_choice="auto"):
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+            received = True
+            delta = choices[0].get("delta") or {}
+            merge_stream_delta(msg, delta)
+            if not delta.get("tool_calls"):
+                continue
+            for idx, call in enumerate(msg["tool_calls"]):
+                fn = call["function"]
+                if idx in started or not fn["name"] or not fn["arguments"].rstrip().endswith("}"):
+                    continue
+                try:
+                    args = orjson.loads(fn["arguments"])
+                except orjson.JSONDecodeError:
+                    continue
+                started[idx] = asyncio.create_task(_call_tool(adapter, fn["name"], args))
+    except BaseException:
+        for task in started.values():
+            task.cancel()
+        raise
+    return (msg if received else {}), started
+
+
+async def run_closed_loop(
+    *,
+    query: str,
+    tools: List[Dict[str, Any]],
+    adapter: OpenAIMCPAdapter,
+    llm: DeepSeekOpenAICompat,
+    max_steps: int,
+    verbose: bool,
+    stream: bool = False,
+) -> str:
+    """执行一次闭环。MCP 连接、tools 与 DeepSeek client 由调用方创建并在多次提问间复用。
+
+    stream=True 时以流式接收 DeepSeek 响应，参数完整的 tool_call 会在生成结束前提前执行。
+    """
+    messages: List[Dict[str, Any]] = [
+        {
+            "role": "system",
+            "content": (
+                "你是一个金融助手。你可以通过可用工具获取实时数据、新闻、风险评分、异常检测、预测等。"
+                "当需要外部数据时，优先调用工具；拿到工具结果后再给出结论。"
+                "输出请用中文，结构清晰。"
+            ),
+        },
+        {"role": "user", "content": query},
+    ]
+    # 请求预览（不含 key）只构造一次：messages 是同一个 list，原地追加后预览自然是最新的
+    req_preview = {
+        "model": llm.cfg.model,
+        "messages": messages,
+        "tools_count": len(tools),
+        "tool_choice": "auto",
+    }
+
+    for step in range(1, max_steps + 1):
+        print("-" * 80)
+        print(f"[2/5] Step {step}: 请求 DeepSeek /chat/completions")
+
         if verbose:
-            print("tools schema (节选/完整):")
-            print(_pretty(tools))
+            print("Request preview:")
+            print(_pretty(req_preview))
+
+        started: Dict[int, asyncio.Task] = {}
+        if stream:
+            msg, started = await _stream_assistant_message(llm, messages, tools, adapter)
+            if verbose:
+                print("Streamed message:")
+                print(_pretty(msg))
+        else:
+            resp_json = await llm.chat_completions(messages=messages, tools=tools, tool_choice="auto")
+
+            if verbose:
+                print("Raw response JSON:")
+                print(_pretty(resp_json))
+
+            msg = _extract_message(resp_json)
+        if not msg:
+            raise RuntimeError("DeepSeek 返回空 message，无法继续")
+
+        tool_calls = _extract_tool_calls(msg)
+
+        if not tool_calls:
+            print("[5/5] 模型未发起 tool_calls，闭环结束。")
+            final_text = (msg.get("content") or "").strip()
+            print("最终输出：")
+            print(final_text)
+            return final_text
+
+        # 把 assistant/tool_calls 消息加入历史
+        messages.append(msg)
+
+        print(f"[3/5] 模型发起 tool_calls: {len(tool_calls)}")
+        # 先解析全部参数，再并发执行：同一轮的工具相互独立，耗时取最慢的一个而不是总和
+        call_ids: List[str] = []
+        parsed: List[tuple] = []
+        for idx, call in enumerate(tool_calls, start=1):
+            fn = (call.get("function") or {})
+            name = fn.get("name")
+            args_str = fn.get("arguments") or "{}"
+            args = _safe_json_loads(args_str)
+            call_ids.append(call.get("id") or f"call_{step}_{idx}")
+
+            print(f"  - Tool #{idx}: {name}")
+            print(f"    arguments: {args_str}")
+            parsed.append((name, args))
+
+        print("[4/5] 并发调用 MCP tools...")
+        # 流式模式下已提前启动的调用直接复用其任务
+        results = await asyncio.gather(
+            *(started.get(i) or _call_tool(adapter, name, args) for i, (name, args) in enumerate(parsed)),
+            return_exceptions=True,
+        )
 
-        llm = DeepSeekOpenAICompat(deepseek_cfg)
-        try:
-            messages: List[Dict[str, Any]] = [
+        # 按原顺序回填，保证 tool_call_id 对应关系确定
+        for call_id, tool_result in zip(call_ids, results):
+            if isinstance(tool_result, _MCP_CONNECTION_ERRORS):
+                # 连接已断开，后续工具调用都会失败：交给调用方重连，而不是当作工具结果回填
+                raise tool_result
+            if isinstance(tool_result, Exception):
+                tool_result = {"error": f"tool call failed: {tool_result}"}
+
+            if verbose:
+                print("tool_result:")
+                print(_pretty(tool_result))
+
+            # OpenAI 兼容：role=tool + tool_call_id
+            messages.append(
                 {
-                    "role": "system",
-                    "content": (
-                        "你是一个金融助手。你可以通过可用工具获取实时数据、新闻、风险评分、异常检测、预测等。"
-                        "当需要外部数据时，优先调用工具；拿到工具结果后再给出结论。"
-                        "输出请用中文，结构清晰。"
-                    ),
-                },
-                {"role": "user", "content": query},
-            ]
-
-            for step in range(1, max_steps + 1):
-                print("-" * 80)
-                print(f"[2/5] Step {step}: 请求 DeepSeek /chat/completions")
-
-                if verbose:
-                    # 打印请求 payload（不含 key）
-                    req_preview = {
-                        "model": deepseek_cfg.model,
-                        "messages": messages,
-                        "tools_count": len(tools),
-                        "tool_choice": "auto",
-                    }
-                    print("Request preview:")
-                    print(_pretty(req_preview))
-
-                resp_json = await llm.chat_completions(messages=messages, tools=tools, tool_choice="auto")
-
-                if verbose:
-                    print("Raw response JSON:")
-                    print(_pretty(resp_json))
-
-                msg = _extract_message(resp_json)
-                if not msg:
-                    raise RuntimeError("DeepSeek 返回空 message，无法继续")
-
-                tool_calls = _extract_tool_calls(msg)
-
-                if not tool_calls:
-                    print("[5/5] 模型未发起 tool_calls，闭环结束。")
-                    final_text = (msg.get("content") or "").strip()
-                    print("最终输出：")
-                    print(final_text)
-                    return final_text
-
-                # 把 assistant/tool_calls 消息加入历史
-                messages.append(msg)
-
-                print(f"[3/5] 模型发起 tool_calls: {len(tool_calls)}")
-                for idx, call in enumerate(tool_calls, start=1):
-                    fn = (call.get("function") or {})
-                    name = fn.get("name")
-                    args_str = fn.get("arguments") or "{}"
-                    args = _safe_json_loads(args_str)
-                    call_id = call.get("id") or f"call_{step}_{idx}"
-
-                    print(f"  - Tool #{idx}: {name}")
-                    print(f"    arguments: {args_str}")
-
-                    executor = adapter.tool_executors.get(name)
-                    if executor is None:
-                        tool_result: Any = {
-                            "error": f"tool executor not found for: {name}",
-                            "available": sorted(adapter.tool_executors.keys()),
-                        }
-                    else:
-                        print("[4/5] 调用 MCP tool...")
-                        tool_result = await executor(args if isinstance(args, dict) else {})
-
-                    if verbose:
-                        print("tool_result:")
-                        print(_pretty(tool_result))
-
-                    # OpenAI 兼容：role=tool + tool_call_id
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": call_id,
-                            "content": json.dumps(tool_result, ensure_ascii=False),
-                        }
-                    )
-
-            raise RuntimeError(f"达到 max_steps={max_steps} 仍未结束。可能是工具输出不足或模型循环调用。")
-        finally:
-            await llm.close()
+                    "role": "tool",
+                    "tool_call_id": call_id,
+                    "content": _truncate_tool_content(orjson.dumps(tool_result).decode()),
+                }
+            )
+
+    raise RuntimeError(f"达到 max_steps={max_steps} 仍未结束。可能是工具输出不足或模型循环调用。")
 
 
 def _build_arg_parser() -> argparse.ArgumentParser:
@@ -300,11 +411,72 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     p.add_argument("--env-yaml", type=str, default="env.yaml", help="env.yaml 路径（用于读取 DEEPSEEK_*）")
     p.add_argument("--max-steps", type=int, default=8, help="最多 tool-calling 循环次数")
     p.add_argument("--verbose", action="store_true", help="打印完整请求/响应 JSON")
+    p.add_argument("--stream", action="store_true", help="流式接收 DeepSeek 响应，参数完整的 tool_call 提前执行")
     return p
 
 
+def _set_future(fut: asyncio.Future, line: Optional[str], exc: Optional[BaseException]) -> None:
+    if fut.done():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(line)
+
+
+async def _ainput(prompt: str) -> str:
+    """在守护线程中读取一行输入，等待期间事件循环照常处理 MCP SSE 连接的心跳等后台任务。
+
+    不用 asyncio.to_thread：线程池线程在退出时会被 join，Ctrl+C 后要等用户再按一次回车才能退出。
+    """
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+
+    def reader() -> None:
+        try:
+            line, exc = input(prompt), None
+        except BaseException as e:  # EOFError 等在协程侧抛出
+            line, exc = None, e
+        try:
+            loop.call_soon_threadsafe(_set_future, fut, line, exc)
+        except RuntimeError:  # 事件循环已关闭
+            pass
+
+    threading.Thread(target=reader, daemon=True).start()
+    return await fut
+
+
+async def _connect_mcp(
+    servers: List[MCPServerMetadata], verbose: bool
+) -> tuple[MCPClient, OpenAIMCPAdapter, List[Dict[str, Any]]]:
+    """连接 MCP Server 并拉取 tools。返回的 MCPClient 由调用方负责关闭。"""
+    print("[1/5] 连接 MCP Server 并拉取 tools...")
+    mcp = MCPClient(servers)
+    try:
+        await mcp.connect()
+        adapter = OpenAIMCPAdapter()
+        tools = await adapter.create_tools(mcp)
+    except BaseException:
+        await _close_mcp(mcp)
+        raise
+
+    print(f"已发现 tools: {len(tools)}")
+    if verbose:
+        print("tools schema (节选/完整):")
+        print(_pretty(tools))
+    return mcp, adapter, tools
+
+
+async def _close_mcp(mcp: MCPClient) -> None:
+    """关闭 MCP 连接；连接已断开时关闭过程本身也可能报错，只打印不抛出。"""
+    try:
+        await mcp.close()
+    except Exception as e:
+        print(f"关闭 MCP 连接时出错: {e}")
+
+
 async def _interactive_main(args: argparse.Namespace) -> int:
-    env_yaml = _load_env_yaml(args.env_yaml)
+    env_yaml = load_env_yaml(args.env_yaml) or {}
 
     api_key = args.deepseek_api_key or _get_config_value("DEEPSEEK_API_KEY", env_yaml)
     if not api_key:
@@ -319,47 +491,88 @@ async def _interactive_main(args: argparse.Namespace) -> int:
     )
 
     deepseek_cfg = DeepSeekConfig(api_key=api_key, base_url=base_url, model=model)
+    _print_banner(args.server_url, deepseek_cfg)
 
-    if args.query:
-        await run_closed_loop(
-            query=args.query,
-            server_url=args.server_url,
-            deepseek_cfg=deepseek_cfg,
-            max_steps=args.max_steps,
-            verbose=args.verbose,
-        )
-        return 0
-
-    # 交互模式
-    print("进入交互模式，输入 exit 退出。")
-    while True:
-        try:
-            q = input("你> ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("\n退出")
-            return 0
-        if not q:
-            continue
-        if q.lower() in {"exit", "quit"}:
-            print("退出")
-            return 0
+    servers = [
+        MCPServerMetadata(name="mcp_server", url=args.server_url, transport="sse")
+    ]
+    verbose = args.verbose
 
-        try:
+    # MCP 连接、tools schema 与 DeepSeek client 只建立一次，交互模式下每次提问直接复用；
+    # 连接断开后在下一次提问前重连
+    mcp, adapter, tools = await _connect_mcp(servers, verbose)
+    llm = DeepSeekOpenAICompat(deepseek_cfg)
+    try:
+        if args.query:
             await run_closed_loop(
-                query=q,
-                server_url=args.server_url,
-                deepseek_cfg=deepseek_cfg,
+                query=args.query,
+                tools=tools,
+                adapter=adapter,
+                llm=llm,
                 max_steps=args.max_steps,
-                verbose=args.verbose,
+                verbose=verbose,
+                stream=args.stream,
             )
-        except Exception as e:
-            print(f"运行失败: {e}")
+            return 0
+
+        # 交互模式
+        print("进入交互模式，输入 exit 退出。")
+        connected = bool(mcp.connectors)
+        while True:
+            try:
+                q = (await _ainput("你> ")).strip()
+            except (EOFError, KeyboardInterrupt):
+                print("\n退出")
+                return 0
+            if not q:
+                continue
+            if q.lower() in {"exit", "quit"}:
+                print("退出")
+                return 0
+
+            if not connected:
+                await _close_mcp(mcp)
+                mcp, adapter, tools = await _connect_mcp(servers, verbose)
+                connected = bool(mcp.connectors)
+
+            try:
+                await run_closed_loop(
+                    query=q,
+                    tools=tools,
+                    adapter=adapter,
+                    llm=llm,
+                    max_steps=args.max_steps,
+                    verbose=verbose,
+                    stream=args.stream,
+                )
+            except _MCP_CONNECTION_ERRORS as e:
+                connected = False
+                print(f"运行失败: MCP 连接已断开（{e!r}），下次提问前将自动重连")
+            except Exception as e:
+                print(f"运行失败: {e}")
+    finally:
+        await llm.close()
+        await _close_mcp(mcp)
+
+
+def _run(coro: Any) -> Any:
+    """优先用 uvloop 驱动事件循环（非 Windows 且已安装时），否则退回 asyncio 默认循环。"""
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            if sys.version_info >= (3, 11):
+                return uvloop.run(coro)
+            uvloop.install()
+    return asyncio.run(coro)
 
 
 def main() -> int:
     args = _build_arg_parser().parse_args()
     try:
-        return asyncio.run(_interactive_main(args))
+        return _run(_interactive_main(args))
     except KeyboardInterrupt:
         return 130
 
@@ -5,8 +5,9 @@ import asyncio
 import sys
 import os
 import re
-import json
 import ast
+
+import orjson
 from datetime import datetime
 from mcp.client.sse import sse_client
 from mcp.client.session import ClientSession
@@ -15,6 +16,58 @@ from mcp.client.session import ClientSession
 MCP_SERVER_URL = "http://127.0.0.1:19420/"
 SEP_LINE = "=" * 60
 BORDER_LINE = "-" * 60
+CLEAR_SCREEN_SEQ = "\x1b[2J\x1b[H"
+
+# 输出到终端时才使用 ANSI 颜色，重定向到文件或管道时输出纯文本
+_IS_TTY = sys.stdout.isatty()
+_RED = "\033[31m" if _IS_TTY else ""
+_GREEN = "\033[32m" if _IS_TTY else ""
+_YELLOW = "\033[33m" if _IS_TTY else ""
+_BLUE = "\033[34m" if _IS_TTY else ""
+_BOLD_YELLOW = "\033[1;33m" if _IS_TTY else ""
+_BOLD_CYAN = "\033[1;36m" if _IS_TTY else ""
+_RESET = "\033[0m" if _IS_TTY else ""
+
+# Windows Terminal / mintty 等终端支持 ANSI，只有传统 cmd 控制台需要回退到 cls
+_LEGACY_WIN_CONSOLE = os.name == 'nt' and not (os.environ.get('WT_SESSION') or os.environ.get('TERM'))
+
+_DICT_RE = re.compile(r'\{[^{}]+\}')
+_KV_RE = re.compile(r'^(.+?)[:：]\s*(.+)$')
+_NUM_RE = re.compile(r'[\d.]+')
+
+# 服务器返回字段的候选键名，按优先级排列
+_NAME_KEYS = ('name', 'stock_name', 'title')
+_PRICE_KEYS = ('price', 'current_price', 'latest_price')
+_CHANGE_KEYS = ('change', 'change_amount', 'price_change')
+_CHANGE_PCT_KEYS = ('change_percent', 'change_pct', 'percent')
+_TIMESTAMP_KEYS = ('timestamp', 'time', 'update_time')
+_RATE_KEYS = ('rate', 'exchange_rate', 'price')
+_INVERSE_RATE_KEYS = ('inverse_rate', 'inverse')
+
+# 非字典结果按行显示时，用于识别高亮字段的关键词
+_PRICE_WORDS = frozenset({'价格', 'price'})
+_CHANGE_WORDS = frozenset({'涨跌', 'change', '幅度'})
+_RATE_WORDS = frozenset({'汇率', 'rate'})
+
+# 菜单有效选项
+_VALID_CHOICES = frozenset({"1", "2", "3", "4"})
+
+# 汇率换算示例金额：(金额, 显示文本)
+CURRENCY_EXAMPLE_AMOUNTS = ((100, "100"), (1000, "1,000"), (10000, "10,000"))
+
+# 股票详情字段：(字段名, 显示标签, 前缀)
+STOCK_DETAIL_FIELDS = (
+    ('open', '🌅 今开价格', '¥ '),
+    ('high', '📈 最高价格', '¥ '),
+    ('low', '📉 最低价格', '¥ '),
+    ('volume', '📦 成交量', ''),
+    ('amount', '📊 成交额', ''),
+    ('market_cap', '💎 总市值', ''),
+    ('pe_ratio', '📏 市盈率', ''),
+    ('pb_ratio', '📏 市净率', ''),
+    ('turnover_rate', '📊 换手率', ''),
+    ('amplitude', '📊 振幅', ''),
+)
 
 # ===================== 工具函数 =====================
 def print_logo():
@@ -23,54 +76,84 @@ def print_logo():
     print("💹  股票查询 | 汇率转换 | 纯命令行操作  💹".center(60))
     print(SEP_LINE)
 
-def print_success(msg): 
-    print(f"\033[32m✅ {msg}\033[0m")
+def _emit(line, buf=None):
+    """buf 不为空时追加到缓冲区，否则直接打印"""
+    if buf is None:
+        print(line)
+    else:
+        buf.append(line)
+
+def _flush(buf):
+    """将缓冲区内容一次性写到标准输出"""
+    sys.stdout.write("\n".join(buf) + "\n")
+    sys.stdout.flush()
+
+def print_success(msg, buf=None): 
+    _emit(f"{_GREEN}✅ {msg}{_RESET}", buf)
 
-def print_error(msg): 
-    print(f"\033[31m❌ {msg}\033[0m")
+def print_error(msg, buf=None): 
+    _emit(f"{_RED}❌ {msg}{_RESET}", buf)
 
-def print_info(msg): 
-    print(f"\033[34mℹ️  {msg}\033[0m")
+def print_info(msg, buf=None): 
+    _emit(f"{_BLUE}ℹ️  {msg}{_RESET}", buf)
 
-def print_warning(msg): 
-    print(f"\033[33m⚠️  {msg}\033[0m")
+def print_warning(msg, buf=None): 
+    _emit(f"{_YELLOW}⚠️  {msg}{_RESET}", buf)
 
 def clear_screen(): 
-    os.system('cls' if os.name == 'nt' else 'clear')
+    # 直接输出 ANSI 清屏序列，避免每次都启动 shell 子进程；旧版 Windows 控制台仍使用 cls
+    if _LEGACY_WIN_CONSOLE:
+        os.system('cls')
+        return
+    sys.stdout.write(CLEAR_SCREEN_SEQ)
+    sys.stdout.flush()
 
 def format_number(num, decimals=2):
     """格式化数字，添加千分位"""
-    try:
-        if isinstance(num, str):
-            num = float(num)
-        if isinstance(num, (int, float)):
-            return f"{num:,.{decimals}f}"
-        return str(num)
-    except:
-        return str(num)
+    if isinstance(num, (int, float)):
+        return f"{num:,.{decimals}f}"
+    if isinstance(num, str):
+        try:
+            return f"{float(num):,.{decimals}f}"
+        except ValueError:
+            return num
+    return str(num)
+
+def _format_amount(value):
+    """格式化换算金额（两位小数），整数金额跳过浮点格式化"""
+    if value.is_integer():
+        return f"{int(value):,d}.00"
+    return f"{value:,.2f}"
 
 def format_percentage(pct):
     """格式化百分比，添加涨跌颜色"""
-    try:
-        if isinstance(pct, str):
-            pct_clean = pct.replace('%', '').replace('+', '').strip()
-            pct = float(pct_clean)
-        if pct >= 0:
-            return f"\033[32m+{pct:.2f}% 📈\033[0m"
-        else:
-            return f"\033[31m{pct:.2f}% 📉\033[0m"
-    except:
+    if isinstance(pct, str):
+        try:
+            pct = float(pct.replace('%', '').replace('+', '').strip())
+        except ValueError:
+            return pct
+    elif not isinstance(pct, (int, float)):
         return str(pct)
+    if pct >= 0:
+        return f"{_GREEN}+{pct:.2f}% 📈{_RESET}"
+    else:
+        return f"{_RED}{pct:.2f}% 📉{_RESET}"
 
 def extract_text_from_content(result):
     """从 MCP 响应中提取文本内容"""
-    text_parts = []
-    
     if not result:
         return ""
     
-    if hasattr(result, 'content') and result.content:
-        for content in result.content:
+    contents = getattr(result, 'content', None)
+    # 常见情况：只有一个 TextContent，直接返回文本
+    if contents and len(contents) == 1:
+        text = getattr(contents[0], 'text', None)
+        if text:
+            return text
+    
+    text_parts = []
+    if contents:
+        for content in contents:
             if hasattr(content, 'text') and content.text:
                 text_parts.append(content.text)
             elif isinstance(content, dict):
@@ -86,37 +169,50 @@ def extract_text_from_content(result):
     
     return "\n".join(text_parts)
 
-def parse_dict_string(text):
-    """尝试将字符串解析为 Python 字典或 JSON"""
-    text = text.strip()
-    
-    # 尝试 JSON 解析
+def _loads_dict(text):
+    """先走 orjson 快速路径，失败再用 ast.literal_eval 解析 Python 字面量；非字典返回 None"""
     try:
-        data = json.loads(text)
+        data = orjson.loads(text)
         if isinstance(data, dict):
             return data
-    except:
+    except orjson.JSONDecodeError:
         pass
     
-    # 尝试 Python 字典解析
     try:
-        if text.startswith('{') and text.endswith('}'):
-            data = ast.literal_eval(text)
-            if isinstance(data, dict):
-                return data
-    except:
+        data = ast.literal_eval(text)
+        if isinstance(data, dict):
+            return data
+    except (ValueError, SyntaxError, TypeError):
         pass
     
+    return None
+
+def _iter_lines(text):
+    """逐行遍历文本，去除首尾空白并跳过空行"""
+    return (line for line in (raw.strip() for raw in text.splitlines()) if line)
+
+def _first(data, keys):
+    """按顺序返回第一个非空字段值，都没有时返回空字符串"""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return ''
+
+def parse_dict_string(text):
+    """尝试将字符串解析为 Python 字典或 JSON"""
+    text = text.strip()
+    
+    # 整体是 JSON / Python 字典（能解析成字典的文本必然以花括号包裹）
+    if text.startswith('{') and text.endswith('}'):
+        data = _loads_dict(text)
+        if data is not None:
+            return data
+    
     # 尝试从文本中提取字典
-    try:
-        match = re.search(r'\{[^{}]+\}', text)
-        if match:
-            dict_str = match.group()
-            data = ast.literal_eval(dict_str)
-            if isinstance(data, dict):
-                return data
-    except:
-        pass
+    match = _DICT_RE.search(text)
+    if match:
+        return _loads_dict(match.group())
     
     return None
 
@@ -126,110 +222,99 @@ def display_stock_result(result_text, input_symbol):
     :param result_text: 服务器返回的原始文本
     :param input_symbol: 用户输入的股票代码
     """
-    print("\n" + "📊" * 30)
-    print("📈  股 票 行 情  快  报  📈".center(60))
-    print("📊" * 30 + "\n")
+    out = []
+    out.append("\n" + "📊" * 30)
+    out.append("📈  股 票 行 情  快  报  📈".center(60))
+    out.append("📊" * 30 + "\n")
     
     if not result_text or result_text.strip() == "":
-        print_error(f"❌ 服务器返回的数据为空 (股票代码：{input_symbol})")
-        print_warning("可能原因：")
-        print("   • 股票代码不存在或已退市")
-        print("   • 服务器查询失败")
-        print("   • 数据源暂时不可用")
-        print("\n" + "📊" * 30 + "\n")
+        print_error(f"❌ 服务器返回的数据为空 (股票代码：{input_symbol})", out)
+        print_warning("可能原因：", out)
+        out.append("   • 股票代码不存在或已退市")
+        out.append("   • 服务器查询失败")
+        out.append("   • 数据源暂时不可用")
+        out.append("\n" + "📊" * 30 + "\n")
+        _flush(out)
         return
     
-    print(f"  ⏰ 查询时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(BORDER_LINE)
+    out.append(f"  ⏰ 查询时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    out.append(BORDER_LINE)
     
     # 尝试解析为字典
     data = parse_dict_string(result_text)
     
     if data and isinstance(data, dict):
         # 字典格式 - 美化显示
-        print("\n📋 股票信息：\n")
+        out.append("\n📋 股票信息：\n")
         
         # 获取股票名称（如果服务器返回了的话）
-        name = data.get('name', data.get('stock_name', data.get('title', '')))
+        name = _first(data, _NAME_KEYS)
         
         # 获取股票代码（优先使用用户输入的）
         symbol = input_symbol  # 始终显示用户输入的代码
         
         # 显示股票名称和代码
         if name and name.strip():
-            print(f"  🏢 股票名称：\033[1;36m{name} ({symbol})\033[0m")
+            out.append(f"  🏢 股票名称：{_BOLD_CYAN}{name} ({symbol}){_RESET}")
         else:
             # 没有名称，只显示代码
-            print(f"  🏢 股票代码：\033[1;36m{symbol}\033[0m")
+            out.append(f"  🏢 股票代码：{_BOLD_CYAN}{symbol}{_RESET}")
         
         # 价格信息
-        price = data.get('price', data.get('current_price', data.get('latest_price', '')))
+        price = _first(data, _PRICE_KEYS)
         if price:
-            print(f"  💰 当前价格：\033[1;33m¥ {format_number(price)}\033[0m")
+            out.append(f"  💰 当前价格：{_BOLD_YELLOW}¥ {format_number(price)}{_RESET}")
         
         # 涨跌信息
-        change = data.get('change', data.get('change_amount', data.get('price_change', '')))
-        change_pct = data.get('change_percent', data.get('change_pct', data.get('percent', '')))
+        change = _first(data, _CHANGE_KEYS)
+        change_pct = _first(data, _CHANGE_PCT_KEYS)
         
         if change_pct:
-            print(f"  📊 今日涨跌：{format_percentage(change_pct)}")
+            out.append(f"  📊 今日涨跌：{format_percentage(change_pct)}")
         elif change:
-            print(f"  📊 今日涨跌：{change}")
+            out.append(f"  📊 今日涨跌：{change}")
         
-        print(BORDER_LINE)
+        out.append(BORDER_LINE)
         
         # 其他详细信息
-        details = [
-            ('open', '🌅 今开价格', '¥ '),
-            ('high', '📈 最高价格', '¥ '),
-            ('low', '📉 最低价格', '¥ '),
-            ('volume', '📦 成交量', ''),
-            ('amount', '📊 成交额', ''),
-            ('market_cap', '💎 总市值', ''),
-            ('pe_ratio', '📏 市盈率', ''),
-            ('pb_ratio', '📏 市净率', ''),
-            ('turnover_rate', '📊 换手率', ''),
-            ('amplitude', '📊 振幅', ''),
-        ]
-        
-        for key, label, prefix in details:
+        for key, label, prefix in STOCK_DETAIL_FIELDS:
             value = data.get(key, '')
             if value:
-                print(f"  {label}: {prefix}{value}")
+                out.append(f"  {label}: {prefix}{value}")
         
         # 时间戳
-        timestamp = data.get('timestamp', data.get('time', data.get('update_time', '')))
+        timestamp = _first(data, _TIMESTAMP_KEYS)
         if timestamp:
-            print(f"  ⏰ 数据时间：{timestamp}")
+            out.append(f"  ⏰ 数据时间：{timestamp}")
         
-        print(BORDER_LINE)
+        out.append(BORDER_LINE)
         
     else:
         # 非字典格式 - 按行显示
-        print(f"\n📋 查询结果 ({input_symbol})：\n")
-        for line in result_text.strip().split('\n'):
-            line = line.strip()
-            if line:
-                match = re.match(r'^(.+?)[:：]\s*(.+)$', line)
-                if match:
-                    key = match.group(1).strip()
-                    value = match.group(2).strip()
-                    if any(k in key.lower() for k in ['价格', 'price']):
-                        print(f"  {key}: \033[1;33m{value}\033[0m")
-                    elif any(k in key.lower() for k in ['涨跌', 'change', '幅度']):
-                        if '+' in value or (value.replace('%', '').replace('.', '').replace('-', '').isdigit() and float(value.replace('%', '')) >= 0):
-                            print(f"  {key}: \033[32m{value}\033[0m")
-                        else:
-                            print(f"  {key}: \033[31m{value}\033[0m")
+        out.append(f"\n📋 查询结果 ({input_symbol})：\n")
+        for line in _iter_lines(result_text):
+            match = _KV_RE.match(line)
+            if match:
+                key = match.group(1).strip()
+                value = match.group(2).strip()
+                key_lower = key.lower()
+                if any(k in key_lower for k in _PRICE_WORDS):
+                    out.append(f"  {key}: {_BOLD_YELLOW}{value}{_RESET}")
+                elif any(k in key_lower for k in _CHANGE_WORDS):
+                    if '+' in value or (value.replace('%', '').replace('.', '').replace('-', '').isdigit() and float(value.replace('%', '')) >= 0):
+                        out.append(f"  {key}: {_GREEN}{value}{_RESET}")
                     else:
-                        print(f"  {key}: {value}")
+                        out.append(f"  {key}: {_RED}{value}{_RESET}")
                 else:
-                    print(f"  {line}")
-        print(BORDER_LINE)
+                    out.append(f"  {key}: {value}")
+            else:
+                out.append(f"  {line}")
+        out.append(BORDER_LINE)
     
-    print("\n" + "📊" * 30)
-    print("💡 温馨提示：股市有风险，投资需谨慎！".center(60))
-    print("📊" * 30 + "\n")
+    out.append("\n" + "📊" * 30)
+    out.append("💡 温馨提示：股市有风险，投资需谨慎！".center(60))
+    out.append("📊" * 30 + "\n")
+    _flush(out)
 
 def display_currency_result(result_text, from_curr, to_curr):
     """
@@ -238,83 +323,86 @@ def display_currency_result(result_text, from_curr, to_curr):
     :param from_curr: 用户输入的原货币
     :param to_curr: 用户输入的目标货币
     """
-    print("\n" + "💱" * 30)
-    print("💱  实  时  汇  率  查  询  💱".center(60))
-    print("💱" * 30 + "\n")
+    out = []
+    out.append("\n" + "💱" * 30)
+    out.append("💱  实  时  汇  率  查  询  💱".center(60))
+    out.append("💱" * 30 + "\n")
     
     if not result_text or result_text.strip() == "":
-        print_error(f"❌ 服务器返回的数据为空 ({from_curr} → {to_curr})")
-        print_warning("可能原因：")
-        print("   • 货币代码不正确")
-        print("   • 服务器查询失败")
-        print("   • 数据源暂时不可用")
-        print("\n" + "💱" * 30 + "\n")
+        print_error(f"❌ 服务器返回的数据为空 ({from_curr} → {to_curr})", out)
+        print_warning("可能原因：", out)
+        out.append("   • 货币代码不正确")
+        out.append("   • 服务器查询失败")
+        out.append("   • 数据源暂时不可用")
+        out.append("\n" + "💱" * 30 + "\n")
+        _flush(out)
         return
     
-    print(f"  ⏰ 查询时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(BORDER_LINE)
+    out.append(f"  ⏰ 查询时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    out.append(BORDER_LINE)
     
     # 尝试解析为字典
     data = parse_dict_string(result_text)
     
     if data and isinstance(data, dict):
         # 字典格式 - 美化显示
-        print("\n📋 汇率信息：\n")
+        out.append("\n📋 汇率信息：\n")
         
         # 使用用户输入的货币代码
-        print(f"  🌍 货币对：\033[1;36m{from_curr} ➜ {to_curr}\033[0m")
+        out.append(f"  🌍 货币对：{_BOLD_CYAN}{from_curr} ➜ {to_curr}{_RESET}")
         
-        rate = data.get('rate', data.get('exchange_rate', data.get('price', '')))
+        rate = _first(data, _RATE_KEYS)
+        # 汇率数值只解析一次，后面的换算示例直接复用
+        rate_val = None
         if rate:
-            rate_num = re.search(r'[\d.]+', str(rate))
+            rate_num = _NUM_RE.search(str(rate))
             if rate_num:
-                rate_formatted = format_number(float(rate_num.group()), 4)
-                print(f"  💵 兑换汇率：\033[1;33m1 {from_curr} = {rate_formatted} {to_curr}\033[0m")
+                try:
+                    rate_val = float(rate_num.group())
+                except ValueError:
+                    pass
+            if rate_val is not None:
+                rate_formatted = format_number(rate_val, 4)
+                out.append(f"  💵 兑换汇率：{_BOLD_YELLOW}1 {from_curr} = {rate_formatted} {to_curr}{_RESET}")
             else:
-                print(f"  💵 兑换汇率：{rate}")
+                out.append(f"  💵 兑换汇率：{rate}")
         
-        inverse = data.get('inverse_rate', data.get('inverse', ''))
+        inverse = _first(data, _INVERSE_RATE_KEYS)
         if inverse:
-            print(f"  🔄 反向汇率：{inverse}")
+            out.append(f"  🔄 反向汇率：{inverse}")
         
-        print(BORDER_LINE)
+        out.append(BORDER_LINE)
         
         # 换算示例
-        if rate:
-            rate_num = re.search(r'[\d.]+', str(rate))
-            if rate_num:
-                try:
-                    rate_val = float(rate_num.group())
-                    print("\n💡 换算示例：")
-                    print(f"   • 100 {from_curr} ≈ {format_number(100 * rate_val, 2)} {to_curr}")
-                    print(f"   • 1,000 {from_curr} ≈ {format_number(1000 * rate_val, 2)} {to_curr}")
-                    print(f"   • 10,000 {from_curr} ≈ {format_number(10000 * rate_val, 2)} {to_curr}")
-                except:
-                    pass
+        if rate_val is not None:
+            out.append("\n💡 换算示例：")
+            out.extend(
+                f"   • {label} {from_curr} ≈ {_format_amount(amount * rate_val)} {to_curr}"
+                for amount, label in CURRENCY_EXAMPLE_AMOUNTS
+            )
         
-        print(BORDER_LINE)
+        out.append(BORDER_LINE)
         
     else:
         # 非字典格式 - 按行显示
-        print(f"\n📋 查询结果 ({from_curr} → {to_curr})：\n")
-        for line in result_text.strip().split('\n'):
-            line = line.strip()
-            if line:
-                match = re.match(r'^(.+?)[:：]\s*(.+)$', line)
-                if match:
-                    key = match.group(1).strip()
-                    value = match.group(2).strip()
-                    if any(k in key.lower() for k in ['汇率', 'rate']):
-                        print(f"  {key}: \033[1;33m{value}\033[0m")
-                    else:
-                        print(f"  {key}: {value}")
+        out.append(f"\n📋 查询结果 ({from_curr} → {to_curr})：\n")
+        for line in _iter_lines(result_text):
+            match = _KV_RE.match(line)
+            if match:
+                key = match.group(1).strip()
+                value = match.group(2).strip()
+                if any(k in key.lower() for k in _RATE_WORDS):
+                    out.append(f"  {key}: {_BOLD_YELLOW}{value}{_RESET}")
                 else:
-                    print(f"  {line}")
-        print(BORDER_LINE)
+                    out.append(f"  {key}: {value}")
+            else:
+                out.append(f"  {line}")
+        out.append(BORDER_LINE)
     
-    print("\n" + "💱" * 30)
-    print("⚠️  汇率仅供参考，实际交易以银行报价为准  ⚠️".center(60))
-    print("💱" * 30 + "\n")
+    out.append("\n" + "💱" * 30)
+    out.append("⚠️  汇率仅供参考，实际交易以银行报价为准  ⚠️".center(60))
+    out.append("💱" * 30 + "\n")
+    _flush(out)
 
 # ===================== MCP 客户端类 =====================
 class MCPFinanceClient:
@@ -451,7 +539,7 @@ def print_menu():
     
     while True:
         choice = input("请输入你的选择（1-4）：").strip()
-        if choice in ["1", "2", "3", "4"]:
+        if choice in _VALID_CHOICES:
             return choice
         else:
             print_error("输入无效！请输入 1-4 之间的数字")
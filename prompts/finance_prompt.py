@@ -5,15 +5,20 @@
 """
 
 from prompts import YA_MCPServer_Prompt
+from YA_Agent._env import load_env_yaml
+from YA_Agent._ratelimit import ALPHA_VANTAGE_LIMITER
 from mcp.server.fastmcp import FastMCP
 from mcp.types import Prompt
-import json
+import asyncio
 import aiohttp
+import orjson
 import os
-import yaml
 import csv
 import io
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Optional
 import logging
 
 logger = logging.getLogger("finance_prompts")
@@ -25,15 +30,90 @@ mcp = FastMCP("FinancePrompts")
 ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co/query"
 # 使用单例模式避免重复创建session
 _api_session = None
+# 防止首次并发调用时重复创建session（asyncio.Lock 绑定首次使用它的事件循环）
+_api_session_lock = asyncio.Lock()
+
+# 连接池配置：限制对 Alpha Vantage 的并发连接数，缓存DNS并复用keep-alive连接
+API_CONN_LIMIT = 50
+API_CONN_LIMIT_PER_HOST = 5
+API_DNS_CACHE_TTL = 300
+API_KEEPALIVE_TIMEOUT = 30
+API_TIMEOUT_TOTAL = 15
+API_TIMEOUT_CONNECT = 5
+
+# API响应缓存：键为排序后的请求参数（不含apikey），值为 (写入时间, 响应数据)
+# Alpha Vantage 免费额度很紧，短时间内相同的查询直接复用结果
+API_CACHE_MAXSIZE = 256
+API_CACHE_TTL = {
+    "GLOBAL_QUOTE": 60,
+    "CURRENCY_EXCHANGE_RATE": 60,
+}
+API_CACHE_DEFAULT_TTL = 60
+_api_cache: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+
+def _cache_get(key: tuple, ttl: float):
+    """读取未过期的缓存，命中时移到LRU队尾"""
+    entry = _api_cache.get(key)
+    if entry is None:
+        return None
+    ts, value = entry
+    if time.monotonic() - ts >= ttl:
+        del _api_cache[key]
+        return None
+    _api_cache.move_to_end(key)
+    return value
+
+def _cache_set(key: tuple, value: dict):
+    """写入缓存，超过容量时淘汰最久未使用的条目"""
+    _api_cache[key] = (time.monotonic(), value)
+    _api_cache.move_to_end(key)
+    while len(_api_cache) > API_CACHE_MAXSIZE:
+        _api_cache.popitem(last=False)
 
 async def _get_api_session():
     """获取共享的API会话"""
     global _api_session
-    if _api_session is None:
-        _api_session = aiohttp.ClientSession()
+    if _api_session is not None and not _api_session.closed:
+        return _api_session
+    async with _api_session_lock:
+        if _api_session is None or _api_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=API_CONN_LIMIT,
+                limit_per_host=API_CONN_LIMIT_PER_HOST,
+                ttl_dns_cache=API_DNS_CACHE_TTL,
+                keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+            )
+            timeout = aiohttp.ClientTimeout(total=API_TIMEOUT_TOTAL, connect=API_TIMEOUT_CONNECT)
+            _api_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
     return _api_session
 
-async def _get_api_key() -> str:
+async def close_session():
+    """关闭共享的API会话（服务关闭时调用）"""
+    global _api_session
+    if _api_session is not None and not _api_session.closed:
+        await _api_session.close()
+    _api_session = None
+
+# API Key 在运行期间不会变化，首次读取后缓存，避免每次请求都解析 env.yaml
+_cached_api_key: Optional[str] = None
+_api_key_loaded = False
+
+async def _get_api_key(refresh: bool = False) -> Optional[str]:
+    """
+    获取API Key（首次加载后缓存）
+
+    Args:
+        refresh: 为 True 时忽略缓存，重新读取环境变量和 env.yaml
+    """
+    global _cached_api_key, _api_key_loaded
+    if _api_key_loaded and not refresh:
+        return _cached_api_key
+    # 读取文件和解析YAML是阻塞操作，放到线程中执行，避免阻塞事件循环
+    _cached_api_key = await asyncio.to_thread(_load_api_key)
+    _api_key_loaded = True
+    return _cached_api_key
+
+def _load_api_key() -> Optional[str]:
     """
     获取API Key，支持多种配置源 - 增强版本
     """
@@ -53,15 +133,14 @@ async def _get_api_key() -> str:
         
         logger.info(f"尝试从配置文件加载: {config_path}")
         
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                yaml_key = config.get("ALPHA_VANTAGE_API_KEY")
-                if yaml_key and yaml_key.strip() and yaml_key != "demo":
-                    logger.info("✓ 从env.yaml文件获取API Key")
-                    return yaml_key.strip()
-                else:
-                    logger.warning("env.yaml中的API Key为空或为demo")
+        config = load_env_yaml(config_path)
+        if config is not None:
+            yaml_key = config.get("ALPHA_VANTAGE_API_KEY")
+            if yaml_key and yaml_key.strip() and yaml_key != "demo":
+                logger.info("✓ 从env.yaml文件获取API Key")
+                return yaml_key.strip()
+            else:
+                logger.warning("env.yaml中的API Key为空或为demo")
         else:
             logger.warning(f"配置文件不存在: {config_path}")
             
@@ -70,10 +149,50 @@ async def _get_api_key() -> str:
     
     return None
 
+# 分钟级时间戳缓存：(分钟序号, 格式化字符串)，同一分钟内直接复用
+_minute_stamp = (None, "")
+
+def _current_minute() -> str:
+    """返回当前时间 'YYYY-mm-dd HH:MM'，同一分钟内只格式化一次"""
+    global _minute_stamp
+    bucket = int(time.time()) // 60
+    if _minute_stamp[0] != bucket:
+        _minute_stamp = (bucket, time.strftime('%Y-%m-%d %H:%M'))
+    return _minute_stamp[1]
+
+def _parse_json_response(raw: bytes) -> dict:
+    """
+    直接从字节解析 Alpha Vantage 的 JSON 响应（省去先解码成 str 的拷贝），
+    API 返回的错误或频率限制信息转换为 {"error": ...}
+    """
+    data = orjson.loads(raw)
+    if not isinstance(data, dict):
+        return {"error": "API返回了非预期的数据格式"}
+    error = data.get("Error Message")
+    if error:
+        logger.error(f"API返回错误: {error}")
+        return {"error": error}
+    note = data.get("Note")
+    if note:
+        logger.warning(f"API限制: {note}")
+        return {"error": f"API调用频率限制: {note}"}
+    # 超出免费额度时返回的是 Information 而不是 Note
+    information = data.get("Information")
+    if information:
+        logger.warning(f"API限制: {information}")
+        return {"error": f"API调用频率限制: {information}"}
+    return data
+
 async def _make_api_request(params: dict) -> dict:
     """
     发送API请求 - 修正版本
     """
+    cache_key = tuple(sorted(params.items()))
+    cache_ttl = API_CACHE_TTL.get(params.get("function"), API_CACHE_DEFAULT_TTL)
+    cached = _cache_get(cache_key, cache_ttl)
+    if cached is not None:
+        return cached
+    
     api_key = await _get_api_key()
     if not api_key:
         return {"error": "API Key未配置，请在env.yaml中设置ALPHA_VANTAGE_API_KEY"}
@@ -81,6 +200,8 @@ async def _make_api_request(params: dict) -> dict:
     params["apikey"] = api_key
     
     try:
+        # 与智能体、资源模块共用限速器；经 _coalesced_request 合并后，相同参数的并发请求只占用一次额度
+        await ALPHA_VANTAGE_LIMITER.acquire()
         session = await _get_api_session()
         async with session.get(ALPHA_VANTAGE_BASE_URL, params=params) as response:
             if response.status == 200:
@@ -94,21 +215,17 @@ async def _make_api_request(params: dict) -> dict:
                         csv_file = io.StringIO(text_data)
                         reader = csv.DictReader(csv_file)
                         data_list = list(reader)
-                        return {"data": data_list}
+                        result = {"data": data_list}
+                        _cache_set(cache_key, result)
+                        return result
                     except Exception as csv_e:
                          return {"error": f"CSV解析失败: {str(csv_e)}"}
 
                 # 情况2: 处理 JSON 响应
-                data = await response.json()
-                # 检查API返回的错误信息
-                if "Error Message" in data:
-                    logger.error(f"API返回错误: {data['Error Message']}")
-                    return {"error": data["Error Message"]}
-                elif "Note" in data:
-                    logger.warning(f"API限制: {data['Note']}")
-                    return {"error": f"API调用频率限制: {data['Note']}"}
-                else:
-                    return data
+                data = _parse_json_response(await response.read())
+                if "error" not in data:
+                    _cache_set(cache_key, data)
+                return data
             else:
                 error_msg = f"API请求失败，状态码: {response.status}"
                 logger.error(error_msg)
@@ -119,6 +236,45 @@ async def _make_api_request(params: dict) -> dict:
         return {"error": error_msg}
 
 
+# 正在进行中的请求：参数相同的并发调用共享同一个任务，只发一次 HTTP
+_inflight: "dict[tuple, asyncio.Task]" = {}
+
+async def _coalesced_request(params: dict) -> dict:
+    """合并参数相同的并发请求（缓存未命中 → 复用进行中的请求 → 发起HTTP）"""
+    key = tuple(sorted(params.items()))
+    task = _inflight.get(key)
+    if task is None:
+        # 传入副本：_make_api_request 会往参数里写入 apikey
+        task = asyncio.ensure_future(_make_api_request(dict(params)))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield：某个调用方被取消时不影响其他等待同一请求的调用方
+    return await asyncio.shield(task)
+
+async def _batch_api_requests(param_list: list) -> list:
+    """
+    批量发送API请求：按参数去重后并发执行，结果按输入顺序返回
+
+    Args:
+        param_list: 请求参数字典列表
+
+    Returns:
+        与 param_list 一一对应的响应字典列表，异常转换为 {"error": ...}
+    """
+    keys = [tuple(sorted(params.items())) for params in param_list]
+    unique = dict(zip(keys, param_list))
+    results = await asyncio.gather(
+        *(_coalesced_request(params) for params in unique.values()),
+        return_exceptions=True,
+    )
+    by_key = {}
+    for key, result in zip(unique, results):
+        if isinstance(result, BaseException):
+            result = {"error": f"网络请求错误: {str(result)}"}
+        by_key[key] = result
+    return [by_key[key] for key in keys]
+
+
 @YA_MCPServer_Prompt()
 async def analyze_stock_trend(symbol: str, period: str = "1month") -> str:
     """
@@ -138,7 +294,7 @@ async def analyze_stock_trend(symbol: str, period: str = "1month") -> str:
             "symbol": symbol
         }
         
-        api_result = await _make_api_request(params)
+        api_result, = await _batch_api_requests([params])
         
         # 2. 构建基于真实数据的提示词
         if "error" in api_result:
@@ -150,7 +306,7 @@ async def analyze_stock_trend(symbol: str, period: str = "1month") -> str:
             change_percent = quote.get("10. change percent", "未知")
             
             data_section = f"""
-📊 实时数据（{datetime.now().strftime('%Y-%m-%d %H:%M')}）：
+📊 实时数据（{_current_minute()}）：
 - 当前价格: {current_price}
 - 涨跌幅: {change} ({change_percent})
 - 最后更新: {quote.get('07. latest trading day', '未知')}
@@ -195,18 +351,19 @@ async def currency_arbitrage_analysis(base_currency: str, target_currencies: lis
         包含实时汇率的套利分析提示词
     """
     try:
-        # 1. 获取实时汇率数据
+        # 1. 批量获取各目标货币的实时汇率数据
         exchange_rates = {}
         
-        for target_currency in target_currencies:
-            params = {
+        results = await _batch_api_requests([
+            {
                 "function": "CURRENCY_EXCHANGE_RATE",
                 "from_currency": base_currency,
                 "to_currency": target_currency
             }
-            
-            api_result = await _make_api_request(params)
-            
+            for target_currency in target_currencies
+        ])
+        
+        for target_currency, api_result in zip(target_currencies, results):
             if "error" not in api_result:
                 rate_data = api_result.get("Realtime Currency Exchange Rate", {})
                 exchange_rates[target_currency] = {
@@ -267,25 +424,28 @@ async def portfolio_risk_assessment(portfolio: dict) -> str:
         基于实时数据的风险评估提示词
     """
     try:
-        # 1. 获取投资组合中股票的实时数据
+        # 1. 批量获取投资组合中股票的实时数据
         stock_data = {}
         
-        for symbol, weight in portfolio.items():
-            if symbol not in ["现金", "cash", "Cash"]:
-                params = {
-                    "function": "GLOBAL_QUOTE",
-                    "symbol": symbol
+        holdings = [(symbol, weight) for symbol, weight in portfolio.items()
+                    if symbol not in ["现金", "cash", "Cash"]]
+        results = await _batch_api_requests([
+            {
+                "function": "GLOBAL_QUOTE",
+                "symbol": symbol
+            }
+            for symbol, _ in holdings
+        ])
+        
+        for (symbol, weight), api_result in zip(holdings, results):
+            if "error" not in api_result:
+                quote = api_result.get("Global Quote", {})
+                stock_data[symbol] = {
+                    "price": quote.get("05. price"),
+                    "change": quote.get("09. change"),
+                    "volume": quote.get("06. volume"),
+                    "weight": weight
                 }
-                
-                api_result = await _make_api_request(params)
-                if "error" not in api_result:
-                    quote = api_result.get("Global Quote", {})
-                    stock_data[symbol] = {
-                        "price": quote.get("05. price"),
-                        "change": quote.get("09. change"),
-                        "volume": quote.get("06. volume"),
-                        "weight": weight
-                    }
         
         # 2. 构建实时数据部分
         portfolio_section = "📊 投资组合实时数据：\n"
@@ -296,7 +456,7 @@ async def portfolio_risk_assessment(portfolio: dict) -> str:
             portfolio_section = "⚠️ 无法获取实时股价数据，使用静态分析框架。\n"
         
         # 3. 返回增强的提示词
-        portfolio_str = json.dumps(portfolio, ensure_ascii=False)
+        portfolio_str = orjson.dumps(portfolio).decode()
         return f"""
 {portfolio_section}
 
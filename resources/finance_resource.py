@@ -7,13 +7,18 @@
 from mcp.server.fastmcp import FastMCP
 from mcp.types import Resource
 import os
-import json
+import asyncio
 import aiohttp
-import yaml
-import csv
-import io
+import orjson
+import time
+import functools
+from collections import OrderedDict
+from typing import Optional
 from datetime import datetime
 from resources import YA_MCPServer_Resource
+from YA_Agent._cache import KeyedLocks
+from YA_Agent._env import load_env_yaml
+from YA_Agent._ratelimit import ALPHA_VANTAGE_LIMITER
 import logging
 
 logger = logging.getLogger("finance_resources")
@@ -26,17 +31,54 @@ ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co/query"
 
 # 使用单例模式避免重复创建session
 _api_session = None
+# 防止首次并发调用时重复创建session
+_api_session_lock = asyncio.Lock()
+
+# 连接池配置：复用到 Alpha Vantage 的 keep-alive 连接并缓存DNS
+API_CONN_LIMIT = 100
+API_CONN_LIMIT_PER_HOST = 20
+API_DNS_CACHE_TTL = 300
+API_KEEPALIVE_TIMEOUT = 60
+API_TIMEOUT_TOTAL = 15
+API_TIMEOUT_CONNECT = 5
 
 async def _get_api_session():
     """获取共享的API会话"""
     global _api_session
-    if _api_session is None:
-        _api_session = aiohttp.ClientSession()
+    if _api_session is not None and not _api_session.closed:
+        return _api_session
+    async with _api_session_lock:
+        if _api_session is None or _api_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=API_CONN_LIMIT,
+                limit_per_host=API_CONN_LIMIT_PER_HOST,
+                ttl_dns_cache=API_DNS_CACHE_TTL,
+                keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+            )
+            timeout = aiohttp.ClientTimeout(total=API_TIMEOUT_TOTAL, connect=API_TIMEOUT_CONNECT)
+            _api_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
     return _api_session
 
-async def _get_api_key() -> str:
+async def close_api_session():
+    """关闭共享的API会话（服务关闭时调用）"""
+    global _api_session
+    if _api_session is not None and not _api_session.closed:
+        await _api_session.close()
+    _api_session = None
+
+async def _get_api_key() -> Optional[str]:
+    """
+    获取API Key：首次在线程中读取配置，之后直接返回缓存结果
+    """
+    if _load_api_key.cache_info().currsize:
+        return _load_api_key()
+    return await asyncio.to_thread(_load_api_key)
+
+@functools.lru_cache(maxsize=1)
+def _load_api_key() -> Optional[str]:
     """
     获取API Key，支持多种配置源 - 增强版本
+    API Key 运行期间不会变化，结果只计算一次
     """
     # 1. 从环境变量获取（最高优先级）
     api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
@@ -52,26 +94,132 @@ async def _get_api_key() -> str:
         project_root = os.path.dirname(os.path.dirname(current_file))
         config_path = os.path.join(project_root, "env.yaml")
         
-        logger.info(f"尝试从配置文件加载: {config_path}")
+        logger.debug("尝试从配置文件加载: %s", config_path)
         
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                yaml_key = config.get("ALPHA_VANTAGE_API_KEY")
-                if yaml_key and yaml_key.strip() and yaml_key != "demo":
-                    logger.info("✓ 从env.yaml文件获取API Key")
-                    return yaml_key.strip()
-                else:
-                    logger.warning("env.yaml中的API Key为空或为demo")
+        config = load_env_yaml(config_path)
+        if config is not None:
+            yaml_key = config.get("ALPHA_VANTAGE_API_KEY")
+            if yaml_key and yaml_key.strip() and yaml_key != "demo":
+                logger.info("✓ 从env.yaml文件获取API Key")
+                return yaml_key.strip()
+            else:
+                logger.warning("env.yaml中的API Key为空或为demo")
         else:
-            logger.warning(f"配置文件不存在: {config_path}")
+            logger.warning("配置文件不存在: %s", config_path)
             
     except Exception as e:
-        logger.error(f"读取env.yaml失败: {e}")
+        logger.error("读取env.yaml失败: %s", e)
     
     return None
 
+# API响应缓存：键为排序后的请求参数（不含apikey），值为 (写入时间, 响应数据)
+# 资源会被客户端反复轮询，按数据变化频率设置不同的过期时间
+API_CACHE_MAXSIZE = 256
+API_CACHE_TTL = {
+    "GLOBAL_QUOTE": 60,
+    "CURRENCY_EXCHANGE_RATE": 300,
+    "LISTING_STATUS": 86400,
+    "MARKET_STATUS": 30,
+}
+API_CACHE_DEFAULT_TTL = 60
+_api_cache: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+# 每个请求键一把锁：相同参数的并发请求只有一个真正访问网络，其余等待后命中缓存
+_request_locks = KeyedLocks()
+
+def _cache_get(key: tuple, ttl: float):
+    """读取未过期的缓存，命中时移到LRU队尾"""
+    entry = _api_cache.get(key)
+    if entry is None:
+        return None
+    ts, value = entry
+    if time.monotonic() - ts >= ttl:
+        del _api_cache[key]
+        return None
+    _api_cache.move_to_end(key)
+    return value
+
+def _cache_set(key: tuple, value: dict):
+    """写入缓存，超过容量时淘汰最久未使用的条目"""
+    _api_cache[key] = (time.monotonic(), value)
+    _api_cache.move_to_end(key)
+    while len(_api_cache) > API_CACHE_MAXSIZE:
+        _api_cache.popitem(last=False)
+
+# 条件请求：对体积大或变化慢的接口记录 ETag / Last-Modified，
+# 缓存过期后带上校验头重新请求，服务器返回 304 时直接复用上次的数据
+CONDITIONAL_FUNCTIONS = frozenset({"LISTING_STATUS", "MARKET_STATUS"})
+_validators: "OrderedDict[tuple, tuple[Optional[str], Optional[str], dict]]" = OrderedDict()
+
+def _conditional_headers(key: tuple) -> dict:
+    """根据上次响应的校验信息构造条件请求头"""
+    entry = _validators.get(key)
+    if entry is None:
+        return {}
+    etag, last_modified, _ = entry
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+def _store_validators(key: tuple, response, data: dict):
+    """记录响应的 ETag / Last-Modified 及对应数据，没有校验头时不记录"""
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return
+    _validators[key] = (etag, last_modified, data)
+    _validators.move_to_end(key)
+    while len(_validators) > API_CACHE_MAXSIZE:
+        _validators.popitem(last=False)
+
+def _not_modified_data(key: tuple, response) -> Optional[dict]:
+    """服务器返回 304 时取出上次记录的数据"""
+    if response.status != 304:
+        return None
+    entry = _validators.get(key)
+    return entry[2] if entry is not None else None
+
+def _request_key(params: dict) -> tuple:
+    """请求参数对应的缓存键（不含 apikey）"""
+    return tuple(sorted((k, v) for k, v in params.items() if k != "apikey"))
+
+# 等待限速器的最长时间：aiohttp 的 ClientTimeout 不包含这段等待，超过后直接返回错误，避免 MCP 客户端长时间挂起
+API_LIMITER_TIMEOUT = 10
+
+async def _acquire_rate_limit() -> bool:
+    """在 API_LIMITER_TIMEOUT 秒内获取一次请求额度，超时返回 False"""
+    try:
+        await asyncio.wait_for(ALPHA_VANTAGE_LIMITER.acquire(), API_LIMITER_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("等待API请求额度超时")
+        return False
+    return True
+
+_RATE_LIMIT_ERROR = {"error": "API调用额度已用完，请稍后再试"}
+
 async def _make_api_request(params: dict) -> dict:
+    """
+    发送API请求（带TTL缓存和并发请求合并）
+    """
+    key = _request_key(params)
+    ttl = API_CACHE_TTL.get(params.get("function"), API_CACHE_DEFAULT_TTL)
+    cached = _cache_get(key, ttl)
+    if cached is not None:
+        return cached
+    
+    async with _request_locks.hold(key):
+        # 等锁期间其他请求可能已经写入缓存
+        cached = _cache_get(key, ttl)
+        if cached is not None:
+            return cached
+        result = await _fetch_api(params, key)
+        if "error" not in result:
+            _cache_set(key, result)
+        return result
+
+async def _fetch_api(params: dict, key: tuple) -> dict:
     """
     发送API请求 - 修正版本
     """
@@ -80,36 +228,36 @@ async def _make_api_request(params: dict) -> dict:
         return {"error": "API Key未配置，请在env.yaml中设置ALPHA_VANTAGE_API_KEY"}
     
     params["apikey"] = api_key
+    conditional = params.get("function") in CONDITIONAL_FUNCTIONS
+    headers = _conditional_headers(key) if conditional else None
+    
+    if not await _acquire_rate_limit():
+        return dict(_RATE_LIMIT_ERROR)
     
     try:
         session = await _get_api_session()
-        async with session.get(ALPHA_VANTAGE_BASE_URL, params=params) as response:
+        async with session.get(ALPHA_VANTAGE_BASE_URL, params=params, headers=headers) as response:
+            data = _not_modified_data(key, response) if conditional else None
+            if data is not None:
+                return data
             if response.status == 200:
-                # 检查响应类型
-                content_type = response.headers.get("Content-Type", "")
-                
-                # 情况1: 处理 CSV 响应 (如 LISTING_STATUS)
-                if "application/x-download" in content_type or "text/csv" in content_type or params.get("function") == "LISTING_STATUS":
-                    text_data = await response.text()
-                    try:
-                        # 解析 CSV 为 JSON 格式列表
-                        csv_file = io.StringIO(text_data)
-                        reader = csv.DictReader(csv_file)
-                        data_list = list(reader)
-                        return {"data": data_list}
-                    except Exception as csv_e:
-                         return {"error": f"CSV解析失败: {str(csv_e)}"}
-
-                # 情况2: 处理 JSON 响应
-                data = await response.json()
+                # 这里只处理 JSON 响应（返回 CSV 的 LISTING_STATUS 由 _fetch_listing_symbols 流式读取）
+                # orjson 直接解析字节，跳过 aiohttp 的编码探测和 str 解码
+                data = orjson.loads(await response.read())
                 # 检查API返回的错误信息
                 if "Error Message" in data:
-                    logger.error(f"API返回错误: {data['Error Message']}")
+                    logger.error("API返回错误: %s", data["Error Message"])
                     return {"error": data["Error Message"]}
                 elif "Note" in data:
-                    logger.warning(f"API限制: {data['Note']}")
+                    logger.warning("API限制: %s", data["Note"])
                     return {"error": f"API调用频率限制: {data['Note']}"}
+                elif "Information" in data:
+                    # 超出免费额度时返回的是 Information 而不是 Note
+                    logger.warning("API限制: %s", data["Information"])
+                    return {"error": f"API调用频率限制: {data['Information']}"}
                 else:
+                    if conditional:
+                        _store_validators(key, response, data)
                     return data
             else:
                 error_msg = f"API请求失败，状态码: {response.status}"
@@ -120,6 +268,122 @@ async def _make_api_request(params: dict) -> dict:
         logger.error(error_msg)
         return {"error": error_msg}
 
+# live_us 返回的股票代码数量上限
+LIVE_SYMBOLS_LIMIT = 50
+
+async def _fetch_listing_symbols(params: dict, limit: int = LIVE_SYMBOLS_LIMIT) -> dict:
+    """
+    流式读取 LISTING_STATUS 的CSV（全量有数MB），只解析前 limit 个股票代码后即停止下载
+
+    Returns:
+        {"data": [股票代码, ...]} 或 {"error": ...}
+    """
+    key = tuple(sorted(params.items())) + (("_limit", limit),)
+    ttl = API_CACHE_TTL["LISTING_STATUS"]
+    cached = _cache_get(key, ttl)
+    if cached is not None:
+        return cached
+    
+    # 与 _make_api_request 共用按键的锁：冷缓存下并发读取只发起一次下载
+    async with _request_locks.hold(key):
+        cached = _cache_get(key, ttl)
+        if cached is not None:
+            return cached
+        result = await _stream_listing_symbols(params, key, limit)
+        if "error" not in result:
+            _cache_set(key, result)
+        return result
+
+async def _stream_listing_symbols(params: dict, key: tuple, limit: int) -> dict:
+    """发送 LISTING_STATUS 请求并流式解析股票代码"""
+    api_key = await _get_api_key()
+    if not api_key:
+        return {"error": "API Key未配置，请在env.yaml中设置ALPHA_VANTAGE_API_KEY"}
+    
+    if not await _acquire_rate_limit():
+        return dict(_RATE_LIMIT_ERROR)
+    
+    try:
+        session = await _get_api_session()
+        async with session.get(
+            ALPHA_VANTAGE_BASE_URL,
+            params={**params, "apikey": api_key},
+            headers=_conditional_headers(key),
+        ) as response:
+            data = _not_modified_data(key, response)
+            if data is not None:
+                return data
+            if response.status != 200:
+                error_msg = f"API请求失败，状态码: {response.status}"
+                logger.error(error_msg)
+                return {"error": error_msg}
+            
+            header = await response.content.readline()
+            if not header.startswith(b"symbol"):
+                # 出错时API返回的是JSON而不是CSV
+                body = header + await response.read()
+                try:
+                    data = orjson.loads(body)
+                except orjson.JSONDecodeError:
+                    data = None
+                error_msg = "LISTING_STATUS 返回了非CSV数据"
+                if isinstance(data, dict):
+                    error_msg = data.get("Error Message") or data.get("Note") or data.get("Information") or error_msg
+                logger.error("API返回错误: %s", error_msg)
+                return {"error": error_msg}
+            
+            symbols = []
+            async for line in response.content:
+                symbol = line.split(b",", 1)[0].strip()
+                if symbol:
+                    symbols.append(symbol.decode())
+                    if len(symbols) >= limit:
+                        break
+            # 提前结束时直接关闭连接，不再下载剩余内容
+            response.close()
+            result = {"data": symbols}
+            _store_validators(key, response, result)
+            return result
+    except Exception as e:
+        error_msg = f"网络请求错误: {str(e)}"
+        logger.error(error_msg)
+        return {"error": error_msg}
+
+# 静态数据：模块加载时构建一次，各资源处理函数直接引用（只读）
+_STATIC_CURRENCY_LIST = (
+    {"code": "USD", "name": "美元", "symbol": "$", "status": "static"},
+    {"code": "CNY", "name": "人民币", "symbol": "¥", "status": "static"},
+    {"code": "EUR", "name": "欧元", "symbol": "€", "status": "static"},
+    {"code": "GBP", "name": "英镑", "symbol": "£", "status": "static"},
+    {"code": "JPY", "name": "日元", "symbol": "¥", "status": "static"},
+    {"code": "HKD", "name": "港币", "symbol": "HK$", "status": "static"},
+    {"code": "CAD", "name": "加元", "symbol": "C$", "status": "static"},
+)
+
+# 货币代码 -> 静态信息（名称、符号）
+_CURRENCY_INFO = {c["code"]: c for c in _STATIC_CURRENCY_LIST}
+
+# 货币列表中查询实时汇率的货币对（均以人民币为基准）
+_FX_PAIRS = (("USD", "CNY"), ("EUR", "CNY"), ("GBP", "CNY"), ("JPY", "CNY"), ("HKD", "CNY"))
+# 货币列表发起实时请求时给智能体、工具和提示词保留的请求额度：
+# 额度不足的货币对直接使用静态数据，不占满整分钟的额度
+FX_RESERVED_CAPACITY = 2
+
+_LIVE_CN_SYMBOLS = ("600519.SH", "601318.SH", "000001.SZ", "000858.SZ", "600036.SH", "601166.SH", "600900.SH", "002594.SZ")
+
+_STATIC_SYMBOL_MAP = {
+    "us": ("AAPL", "TSLA", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "NFLX", "DIS"),
+    "hk": ("0700.HK", "0005.HK", "1299.HK", "0941.HK", "0388.HK", "1810.HK"),
+    "cn": ("600519.SS", "000001.SZ", "000002.SZ", "601318.SS", "600036.SS"),
+    "crypto": ("BTC", "ETH", "ADA", "DOT", "SOL", "BNB", "XRP"),
+    "live_us": ("需要有效API Key获取实时数据",),  # 提示信息
+    "live_cn": ("需要有效API Key获取实时数据",),  # 提示信息
+}
+
+def _dumps(obj) -> str:
+    """序列化为缩进2格的JSON字符串（非ASCII字符原样输出）"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
 @YA_MCPServer_Resource("finance://market/status")
 async def get_market_status() -> str:
     """
@@ -135,32 +399,34 @@ async def get_market_status() -> str:
         }
         
         api_result = await _make_api_request(params)
+        # 同一响应内的时间字段使用同一时刻
+        now = datetime.now()
         
         if "error" in api_result:
             # 如果API失败，返回模拟数据作为降级方案
             status_data = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
                 "global_markets": {
-                    "us_market": "open" if 9 <= datetime.now().hour < 17 else "closed",
-                    "hk_market": "open" if 9 <= datetime.now().hour < 16 else "closed",
-                    "cn_market": "open" if 9 <= datetime.now().hour < 15 else "closed"
+                    "us_market": "open" if 9 <= now.hour < 17 else "closed",
+                    "hk_market": "open" if 9 <= now.hour < 16 else "closed",
+                    "cn_market": "open" if 9 <= now.hour < 15 else "closed"
                 },
-                "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "last_updated": now.strftime("%Y-%m-%d %H:%M:%S"),
                 "note": "使用模拟数据（API调用失败）",
                 "api_error": api_result["error"]
             }
         else:
             # 处理真实API响应
             status_data = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
                 "api_response": api_result,
-                "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "last_updated": now.strftime("%Y-%m-%d %H:%M:%S"),
                 "source": "alpha_vantage_api"
             }
         
-        return json.dumps(status_data, ensure_ascii=False, indent=2)
+        return _dumps(status_data)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 @YA_MCPServer_Resource("finance://currency/list")
 async def get_currency_list() -> str:
@@ -171,48 +437,63 @@ async def get_currency_list() -> str:
         货币列表JSON数据
     """
     try:
-        # 尝试获取实时汇率数据
-        params = {
-            "function": "CURRENCY_EXCHANGE_RATE",
-            "from_currency": "USD",
-            "to_currency": "CNY"
-        }
+        # 缓存未命中的货币对需要占用请求额度：按剩余额度决定哪些查询实时数据，其余使用静态数据
+        ttl = API_CACHE_TTL["CURRENCY_EXCHANGE_RATE"]
+        live_pairs = []
+        planned = 0
+        for from_currency, to_currency in _FX_PAIRS:
+            params = {
+                "function": "CURRENCY_EXCHANGE_RATE",
+                "from_currency": from_currency,
+                "to_currency": to_currency
+            }
+            if _cache_get(_request_key(params), ttl) is None:
+                if not ALPHA_VANTAGE_LIMITER.has_capacity(planned + 1 + FX_RESERVED_CAPACITY):
+                    continue
+                planned += 1
+            live_pairs.append((from_currency, params))
         
-        api_result = await _make_api_request(params)
+        # 并发获取实时汇率，共享同一会话的连接池，总耗时取决于最慢的一个请求
+        api_results = await asyncio.gather(
+            *(_make_api_request(params) for _, params in live_pairs),
+            return_exceptions=True
+        )
         
-        if "error" in api_result:
-            # 降级到静态数据
-            currency_list = [
-                {"code": "USD", "name": "美元", "symbol": "$", "status": "static"},
-                {"code": "CNY", "name": "人民币", "symbol": "¥", "status": "static"},
-                {"code": "EUR", "name": "欧元", "symbol": "€", "status": "static"},
-                {"code": "GBP", "name": "英镑", "symbol": "£", "status": "static"},
-                {"code": "JPY", "name": "日元", "symbol": "¥", "status": "static"},
-                {"code": "HKD", "name": "港币", "symbol": "HK$", "status": "static"},
-                {"code": "CAD", "name": "加元", "symbol": "C$", "status": "static"}
-            ]
-            source = "static_data_fallback"
-        else:
-            # 处理实时数据
+        live = {}
+        for (from_currency, _), api_result in zip(live_pairs, api_results):
+            if isinstance(api_result, Exception) or "error" in api_result:
+                logger.warning("获取 %s 汇率失败: %s", from_currency, api_result)
+                continue
             exchange_data = api_result.get("Realtime Currency Exchange Rate", {})
-            currency_list = [
-                {
-                    "code": "USD", 
-                    "name": "美元", 
-                    "symbol": "$", 
-                    "status": "live",
-                    "exchange_rate": exchange_data.get("5. Exchange Rate"),
-                    "last_refreshed": exchange_data.get("6. Last Refreshed")
-                },
-                {
-                    "code": "CNY", 
-                    "name": "人民币", 
-                    "symbol": "¥", 
-                    "status": "live",
-                    "exchange_rate": "1.0"  # 基准货币
-                }
-            ]
+            if not exchange_data.get("5. Exchange Rate"):
+                logger.warning("%s 汇率数据缺失: %s", from_currency, api_result)
+                continue
+            info = _CURRENCY_INFO[from_currency]
+            live[from_currency] = {
+                "code": from_currency,
+                "name": info["name"],
+                "symbol": info["symbol"],
+                "status": "live",
+                "exchange_rate": exchange_data.get("5. Exchange Rate"),
+                "last_refreshed": exchange_data.get("6. Last Refreshed")
+            }
+        
+        # 未取得实时汇率的货币保留静态信息，列表内容保持完整
+        currency_list = [live.get(code) or _CURRENCY_INFO[code] for code, _ in _FX_PAIRS] if live else []
+        
+        if currency_list:
+            currency_list.append({
+                "code": "CNY", 
+                "name": "人民币", 
+                "symbol": "¥", 
+                "status": "live",
+                "exchange_rate": "1.0"  # 基准货币
+            })
             source = "alpha_vantage_api"
+        else:
+            # 全部失败时降级到静态数据
+            currency_list = _STATIC_CURRENCY_LIST
+            source = "static_data_fallback"
         
         result = {
             "currencies": currency_list,
@@ -220,9 +501,9 @@ async def get_currency_list() -> str:
             "timestamp": datetime.now().isoformat()
         }
         
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return _dumps(result)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 @YA_MCPServer_Resource("finance://stock/symbols/{market}")
 async def get_stock_symbols(market: str) -> str:
@@ -244,63 +525,49 @@ async def get_stock_symbols(market: str) -> str:
                 "state": "active"
             }
             
-            api_result = await _make_api_request(params)
+            api_result = await _fetch_listing_symbols(params)
             
             if "error" not in api_result:
                 # 处理实时股票列表
-                live_symbols = []
-                stocks_data = api_result.get("data", [])
-                for stock in stocks_data[:50]:  # 增加数量限制
-                    symbol = stock.get("symbol")
-                    if symbol:
-                        live_symbols.append(symbol)
+                live_symbols = api_result["data"]
                 
-                return json.dumps({
+                return _dumps({
                     "market": "live_us",
                     "symbols": live_symbols,
                     "count": len(live_symbols),
                     "source": "alpha_vantage_api",
                     "timestamp": datetime.now().isoformat()
-                }, ensure_ascii=False, indent=2)
+                })
 
         elif market.lower() == "live_cn":
             # 获取A股实时列表 (通过搜索特定前缀模拟，API目前不支持直接获取全量A股列表)
             # 这里我们尝试搜索常见的前缀如 600, 000 等，或者返回一部分热门硬编码的实时行情检查
             # 由于 Alpha Vantage 没有直接的 "LISTING_STATUS" for CN，我们使用硬编码的热门列表但去查询其实时价格来验证有效性
             
-            live_symbols = ["600519.SH", "601318.SH", "000001.SZ", "000858.SZ", "600036.SH", "601166.SH", "600900.SH", "002594.SZ"]
+            live_symbols = _LIVE_CN_SYMBOLS
             valid_symbols = []
             
             # 这里只是返回列表，不进行全量检查以避免API限流
-            return json.dumps({
+            return _dumps({
                 "market": "live_cn",
                 "symbols": live_symbols,
                 "count": len(live_symbols),
                 "source": "alpha_vantage_api_proxy", 
                 "timestamp": datetime.now().isoformat()
-            }, ensure_ascii=False, indent=2)
+            })
         
         # 降级到静态数据
-        symbol_map = {
-            "us": ["AAPL", "TSLA", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "NFLX", "DIS"],
-            "hk": ["0700.HK", "0005.HK", "1299.HK", "0941.HK", "0388.HK", "1810.HK"],
-            "cn": ["600519.SS", "000001.SZ", "000002.SZ", "601318.SS", "600036.SS"],
-            "crypto": ["BTC", "ETH", "ADA", "DOT", "SOL", "BNB", "XRP"],
-            "live_us": ["需要有效API Key获取实时数据"],  # 提示信息
-            "live_cn": ["需要有效API Key获取实时数据"]   # 提示信息
-        }
-        
-        symbols = symbol_map.get(market.lower(), [f"未知市场: {market}"])
-        return json.dumps({
+        symbols = _STATIC_SYMBOL_MAP.get(market.lower(), [f"未知市场: {market}"])
+        return _dumps({
             "market": market,
             "symbols": symbols,
             "count": len(symbols),
             "source": "static_data",
             "timestamp": datetime.now().isoformat()
-        }, ensure_ascii=False, indent=2)
+        })
         
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 @YA_MCPServer_Resource("finance://stock/quote/{symbol}")
 async def get_stock_quote_resource(symbol: str) -> str:
@@ -322,11 +589,11 @@ async def get_stock_quote_resource(symbol: str) -> str:
         api_result = await _make_api_request(params)
         
         if "error" in api_result:
-            return json.dumps({
+            return _dumps({
                 "symbol": symbol,
                 "error": api_result["error"],
                 "timestamp": datetime.now().isoformat()
-            }, ensure_ascii=False, indent=2)
+            })
         
         # 格式化响应
         formatted_result = {
@@ -336,9 +603,9 @@ async def get_stock_quote_resource(symbol: str) -> str:
             "source": "alpha_vantage_api"
         }
         
-        return json.dumps(formatted_result, ensure_ascii=False, indent=2)
+        return _dumps(formatted_result)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 # 导出资源列表
 resources = [
@@ -1,5 +1,7 @@
 import logging
 import os
+import threading
+from contextlib import asynccontextmanager
 import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
@@ -22,6 +24,8 @@ from setup import setup
 import tools
 import prompts
 import resources
+from prompts.finance_prompt import close_session as close_prompt_session
+from resources.finance_resource import close_api_session as close_resource_session
 from starlette.middleware.cors import CORSMiddleware
 
 
@@ -61,6 +65,24 @@ class YA_MCPServer:
             lib_logger.propagate = True
             lib_logger.handlers.clear()
 
+    def warmup_predictor(self):
+        """
+        后台预热预测模型：CUDA 上启用 torch.compile 时提前加载模型并完成编译，
+        首个预测请求不再承担编译耗时；CPU 上不编译，保持首次使用时再加载
+        """
+
+        def warmup():
+            try:
+                from core.predictor import FinancialPredictor
+
+                predictor = FinancialPredictor()
+                if predictor.compile_model:
+                    predictor.warmup()
+            except Exception as e:
+                self.logger.warning(f"预测模型预热失败: {e}")
+
+        threading.Thread(target=warmup, name="predictor-warmup", daemon=True).start()
+
     @exception_handler
     def run_stdio(self):
         """通过标准输入输出运行 MCP Server"""
@@ -99,8 +121,16 @@ class YA_MCPServer:
                     mcp_server.create_initialization_options(),
                 )
 
+        @asynccontextmanager
+        async def lifespan(app: Starlette):
+            yield
+            # 关闭提示词、资源模块共享的 HTTP 连接池
+            await close_prompt_session()
+            await close_resource_session()
+
         app = Starlette(
             debug=debug,
+            lifespan=lifespan,
             routes=[
                 Route("/", endpoint=handle_sse),
                 Mount("/messages/", app=sse.handle_post_message),
@@ -125,6 +155,7 @@ class YA_MCPServer:
 
         self.logger.info(f"Starting MCP server: {self.server_name}")
         print_server_banner()
+        self.warmup_predictor()
 
         if self.transport_type == "stdio":
             self.run_stdio()
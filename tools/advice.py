@@ -1,9 +1,18 @@
 # tools/advice.py
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
+from types import MappingProxyType
 from . import YA_MCPServer_Tool
 from tools import YA_MCPServer_Tool
 
+# 模拟数据（实际应连接真实数据源），模块加载时构建一次，只读
+_MOCK_DATA = MappingProxyType({
+    '600519': {'price': 1485.30, 'change_pct': -1.27, 'volume': 4167900, 'pe': 25.5},
+    'AAPL': {'price': 178.50, 'change_pct': 2.35, 'volume': 52000000, 'pe': 28.0},
+    'MSFT': {'price': 415.00, 'change_pct': 1.50, 'volume': 25000000, 'pe': 35.0},
+    'TSLA': {'price': 248.00, 'change_pct': -3.50, 'volume': 80000000, 'pe': 60.0},
+})
+# 未知代码使用的默认数据
+_DEFAULT_STOCK = MappingProxyType({'price': 100, 'change_pct': 0, 'volume': 1000000, 'pe': 20})
+
 @YA_MCPServer_Tool(
     name="get_investment_advice",
     title="获取投资建议",
@@ -14,23 +23,7 @@ async def get_investment_advice(symbol: str) -> dict:
     获取股票投资建议
     使用回归预测 + 规则分类算法
     """
-    # 模拟数据（实际应连接真实数据源）
-    mock_data = {
-        '600519': {'price': 1485.30, 'change_pct': -1.27, 'volume': 4167900, 'pe': 25.5},
-        'AAPL': {'price': 178.50, 'change_pct': 2.35, 'volume': 52000000, 'pe': 28.0},
-        'MSFT': {'price': 415.00, 'change_pct': 1.50, 'volume': 25000000, 'pe': 35.0},
-        'TSLA': {'price': 248.00, 'change_pct': -3.50, 'volume': 80000000, 'pe': 60.0},
-    }
-    
-    data = mock_data.get(symbol, {'price': 100, 'change_pct': 0, 'volume': 1000000, 'pe': 20})
-    
-    # 特征工程
-    features = np.array([[
-        data['change_pct'],
-        data['volume'] / 1000000,
-        data['price'] / 1000,
-        data['pe'] / 100,
-    ]])
+    data = _MOCK_DATA.get(symbol, _DEFAULT_STOCK)
     
     # 简单规则模型（实际应加载训练好的模型）
     change_pct = data['change_pct']
@@ -8,13 +8,17 @@ from mcp.server.fastmcp import FastMCP
 import mcp.server.stdio
 import mcp.types as types
 from YA_Agent.finance_agent import FinanceAgent
+import asyncio
 import logging
+import orjson
 from tools import YA_MCPServer_Tool
 
 logger = logging.getLogger("finance_tool")
 
 # 使用单例模式延迟初始化，避免启动时立即检查API Key
 _finance_agent_instance = None
+# 并发的首次调用（或会话关闭后的再次调用）通过锁保证只初始化一次
+_init_lock = asyncio.Lock()
 
 def get_finance_agent():
     """
@@ -32,6 +36,30 @@ def get_finance_agent():
             _finance_agent_instance = None
     return _finance_agent_instance
 
+async def get_finance_agent_ready():
+    """
+    获取已完成会话初始化的金融智能体实例
+    会话未建立或已被 close() 关闭时（加锁）重新初始化HTTP会话，否则直接返回实例；初始化失败返回None
+    """
+    if not _session_ready(_finance_agent_instance):
+        async with _init_lock:
+            if not _session_ready(_finance_agent_instance):
+                agent = get_finance_agent()
+                if agent is None:
+                    return None
+                await agent.init_session()
+    return _finance_agent_instance
+
+def _session_ready(agent) -> bool:
+    """智能体已实例化且HTTP会话可用"""
+    return agent is not None and agent.session is not None and not agent.session.closed
+
+def format_result(result) -> str:
+    """将智能体结果序列化为JSON文本（字符串结果原样返回）"""
+    if isinstance(result, str):
+        return result
+    return orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
+
 @YA_MCPServer_Tool(
     name="get_stock_info",
     description="获取股票实时报价信息"
@@ -47,13 +75,12 @@ async def get_stock_info(symbol: str = "IBM") -> str:
         股票价格和相关信息
     """
     try:
-        agent = get_finance_agent()
+        agent = await get_finance_agent_ready()
         if agent is None:
             return "金融智能体初始化失败，请检查API Key配置"
             
-        await agent.init_session()
         result = await agent.get_stock_quote(symbol)
-        return str(result)
+        return format_result(result)
     except Exception as e:
         logger.error(f"获取股票信息失败: {e}")
         return f"获取股票信息失败: {str(e)}"
@@ -74,13 +101,12 @@ async def get_currency_rate(from_currency: str = "USD", to_currency: str = "CNY"
         实时汇率信息
     """
     try:
-        agent = get_finance_agent()
+        agent = await get_finance_agent_ready()
         if agent is None:
             return "金融智能体初始化失败，请检查API Key配置"
             
-        await agent.init_session()
         result = await agent.get_exchange_rate(from_currency, to_currency)
-        return str(result)
+        return format_result(result)
     except Exception as e:
         logger.error(f"获取汇率失败: {e}")
         return f"获取汇率失败: {str(e)}"
@@ -100,13 +126,12 @@ async def query_finance_info(query: str) -> str:
         金融数据结果
     """
     try:
-        agent = get_finance_agent()
+        agent = await get_finance_agent_ready()
         if agent is None:
             return "金融智能体初始化失败，请检查API Key配置"
             
-        await agent.init_session()
         result = await agent.process(query)
-        return str(result)
+        return format_result(result)
     except Exception as e:
         logger.error(f"金融查询失败: {e}")
         return f"金融查询失败: {str(e)}"
@@ -4,6 +4,10 @@ from datetime import datetime
 from . import YA_MCPServer_Tool
 from tools import YA_MCPServer_Tool
 
+# 模拟新闻的来源和情感倾向候选
+_SOURCES = ("财联社", "彭博社", "Reuters", "新浪财经")
+_SENTIMENTS = ("positive", "neutral", "negative")
+
 @YA_MCPServer_Tool(
     name="get_latest_news",
     title="获取最新新闻",
@@ -21,21 +25,28 @@ async def get_latest_news(symbol: str, limit: int = 5) -> dict:
         f"市场波动加剧，{symbol} 逆势上涨"
     ]
     
-    news_list = []
-    for i in range(limit):
-        news_list.append({
+    # 一次性抽取所有条目的来源和情感倾向
+    sources = random.choices(_SOURCES, k=limit)
+    sentiments = random.choices(_SENTIMENTS, k=limit)
+    now = datetime.now()
+    now_str = now.strftime('%Y-%m-%d %H:%M')
+    
+    news_list = [
+        {
             "title": mock_titles[i % len(mock_titles)],
-            "source": random.choice(["财联社", "彭博社", "Reuters", "新浪财经"]),
-            "publish_time": datetime.now().strftime('%Y-%m-%d %H:%M'),
+            "source": sources[i],
+            "publish_time": now_str,
             "url": f"https://example.com/news/{symbol}/{i}",
-            "sentiment": random.choice(["positive", "neutral", "negative"])
-        })
+            "sentiment": sentiments[i]
+        }
+        for i in range(limit)
+    ]
 
     return {
         "symbol": symbol,
         "count": len(news_list),
         "news": news_list,
-        "update_time": datetime.now().isoformat()
+        "update_time": now.isoformat()
     }
 
 @YA_MCPServer_Tool(
@@ -1,7 +1,7 @@
 """
 预测工具 - 封装金融预测能力
 """
-from tools.finance_tool import get_finance_agent
+from tools.finance_tool import get_finance_agent_ready, format_result
 from tools import YA_MCPServer_Tool
 import logging
 
@@ -23,15 +23,12 @@ async def predict_stock_price(symbol: str, days: int = 5) -> str:
         JSON格式的预测结果，包含每日预测价格和置信区间
     """
     try:
-        agent = get_finance_agent()
+        agent = await get_finance_agent_ready()
         if agent is None:
             return "金融智能体初始化失败，请检查API Key配置"
-            
-        # 确保session已初始化
-        await agent.init_session()
         
         result = await agent.get_stock_prediction(symbol, days)
-        return str(result)
+        return format_result(result)
         
     except Exception as e:
         logger.error(f"预测失败: {e}")
@@ -1,10 +1,29 @@
 # tools/risk.py
+import functools
+from types import MappingProxyType
 import numpy as np
-from sklearn.cluster import KMeans
 from sklearn.ensemble import IsolationForest
 from . import YA_MCPServer_Tool
 from tools import YA_MCPServer_Tool
 
+# 模拟行情数据，模块加载时构建一次，只读
+_MOCK_STOCKS = MappingProxyType({
+    '600519': {'change_pct': -1.27, 'volatility': 0.02, 'pe_ratio': 25.5, 'volume_ratio': 1.2},
+    'AAPL': {'change_pct': 2.35, 'volatility': 0.015, 'pe_ratio': 28.0, 'volume_ratio': 0.8},
+    'TSLA': {'change_pct': -5.0, 'volatility': 0.05, 'pe_ratio': 60.0, 'volume_ratio': 2.5},
+})
+# 未知代码使用的默认数据
+_DEFAULT_STOCK = MappingProxyType({'change_pct': 0, 'volatility': 0.02, 'pe_ratio': 20, 'volume_ratio': 1.0})
+
+# 风险聚类中心：等价于 KMeans(n_clusters=3, random_state=42, n_init=10) 在
+# [[0,0,0,0], [5,5,5,5], [10,10,10,10]] 上的拟合结果（行顺序即聚类编号），
+# 训练数据固定，无需每次请求重新拟合
+_RISK_CENTROIDS = (
+    (5.0, 5.0, 5.0, 5.0),
+    (10.0, 10.0, 10.0, 10.0),
+    (0.0, 0.0, 0.0, 0.0),
+)
+
 @YA_MCPServer_Tool(
     name="calculate_risk_score",
     title="计算风险评分",
@@ -15,30 +34,25 @@ async def calculate_risk_score(symbol: str) -> dict:
     计算股票风险评分
     使用 K-Means 聚类 + 加权评分算法
     """
-    mock_stocks = {
-        '600519': {'change_pct': -1.27, 'volatility': 0.02, 'pe_ratio': 25.5, 'volume_ratio': 1.2},
-        'AAPL': {'change_pct': 2.35, 'volatility': 0.015, 'pe_ratio': 28.0, 'volume_ratio': 0.8},
-        'TSLA': {'change_pct': -5.0, 'volatility': 0.05, 'pe_ratio': 60.0, 'volume_ratio': 2.5},
-    }
+    data = _MOCK_STOCKS.get(symbol, _DEFAULT_STOCK)
     
-    data = mock_stocks.get(symbol, {'change_pct': 0, 'volatility': 0.02, 'pe_ratio': 20, 'volume_ratio': 1.0})
-    
-    # 特征向量
-    features = np.array([[
+    # 特征（只有4个标量，直接用Python浮点运算，不构造 ndarray）
+    features = (
         abs(data['change_pct']),
         data['volatility'] * 100,
         data['pe_ratio'] / 100,
         data['volume_ratio'],
-    ]])
+    )
     
-    # K-Means 聚类（模拟）
-    kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-    kmeans.fit([[0, 0, 0, 0], [5, 5, 5, 5], [10, 10, 10, 10]])
-    cluster = kmeans.predict(features)[0]
+    # K-Means 聚类（模拟）：取距离最近的聚类中心
+    cluster = min(
+        range(len(_RISK_CENTROIDS)),
+        key=lambda i: sum((f - c) ** 2 for f, c in zip(features, _RISK_CENTROIDS[i])),
+    )
     
-    # 风险评分计算
-    weights = [0.3, 0.3, 0.2, 0.2]
-    risk_score = np.sum(features[0] * weights) * 10
+    # 风险评分计算：权重 0.3/0.3/0.2/0.2
+    c, v, p, r = features
+    risk_score = 10.0 * (0.3 * c + 0.3 * v + 0.2 * p + 0.2 * r)
     
     if risk_score > 50:
         risk_level = "高风险"
@@ -67,6 +81,22 @@ async def calculate_risk_score(symbol: str) -> dict:
         "algorithm": "K-Means 聚类 + 加权评分"
     }
 
+@functools.lru_cache(maxsize=128)
+def _detect_anomaly(days: int) -> bool:
+    """
+    训练数据和待检测数据都由固定种子 42 生成，结果只取决于 days，
+    因此按 days 缓存，避免每次请求都重新生成数据并拟合 Isolation Forest
+    """
+    # 使用独立的随机数生成器（与 np.random.seed(42) 序列一致），不修改全局随机状态
+    rng = np.random.RandomState(42)
+    normal_data = rng.randn(days, 4) * 0.5
+    model = IsolationForest(contamination=0.1, random_state=42)
+    model.fit(normal_data)
+    
+    current_data = rng.randn(1, 4) * 0.5
+    prediction = model.predict(current_data)[0]
+    return bool(prediction == -1)
+
 @YA_MCPServer_Tool(
     name="detect_anomaly",
     title="检测异常交易",
@@ -77,14 +107,7 @@ async def detect_anomaly(symbol: str, days: int = 30) -> dict:
     检测异常交易行为
     使用 Isolation Forest 异常检测算法
     """
-    np.random.seed(42)
-    normal_data = np.random.randn(days, 4) * 0.5
-    model = IsolationForest(contamination=0.1, random_state=42)
-    model.fit(normal_data)
-    
-    current_data = np.random.randn(1, 4) * 0.5
-    prediction = model.predict(current_data)[0]
-    is_anomaly = prediction == -1
+    is_anomaly = _detect_anomaly(days)
     
     return {
         "symbol": symbol,
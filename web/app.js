@@ -185,6 +185,15 @@ function safeJsonParse(line) {
   }
 }
 
+const canDecompress = typeof DecompressionStream !== "undefined";
+
+// bridge 对大事件做了 gzip + base64（type=blob_gz），这里还原成原始事件
+async function decodeBlobGz(b64) {
+  const bytes = Uint8Array.from(atob(b64), (c) => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  return safeJsonParse(await new Response(stream).text());
+}
+
 function buildUrl(path, params) {
   const url = new URL(path, window.location.origin);
   Object.entries(params).forEach(([k, v]) => {
@@ -286,8 +295,17 @@ createApp({
     }
 
     function pushEvent(ev) {
+      // delta 为 DeepSeek 流式输出的增量文本，直接拼到最终输出区，不进过程日志
+      if (ev.type === "delta") {
+        finalText.value += ev.content || "";
+        return;
+      }
+
       events.value.push(ev);
 
+      // 新一轮请求开始，清掉上一轮（随后发起了 tool_calls）的中间文本
+      if (ev.type === "deepseek_request") finalText.value = "";
+
       if (ev.type === "meta") meta.value = ev;
       if (ev.type === "tools") toolsCount.value = ev.count;
       if (ev.type === "status") status.value = ev.message || "running";
@@ -324,15 +342,24 @@ createApp({
         server_url: serverUrl.value,
         max_steps: maxSteps.value,
         verbose: verbose.value ? 1 : 0,
+        compress: canDecompress ? 1 : 0,
       });
 
       const es = new EventSource(url.toString());
       esRef.value = es;
 
+      // 解压是异步的：用 promise 链串行处理，保证事件顺序不乱；
+      // 单个事件解压或处理失败时转成 error 事件，链不会停在 rejected 状态而吞掉后续事件
+      let pending = Promise.resolve();
       es.onmessage = (msg) => {
         const data = safeJsonParse(msg.data);
         if (!data) return;
-        pushEvent(data);
+        pending = pending
+          .then(() => (data.type === "blob_gz" ? decodeBlobGz(data.data) : data))
+          .then((ev) => {
+            if (ev) pushEvent(ev);
+          })
+          .catch((err) => pushEvent({ type: "error", message: String(err) }));
       };
 
       es.onerror = () => {